@@ -0,0 +1 @@
+# bayt.com job scraper. Run it with: python -m bayt_jobs [crawl|enqueue|worker|merge|reparse|benchmark|serve] [options]
@@ -0,0 +1,36 @@
+import importlib
+import sys
+
+# Command -> "module:function"; only the chosen command's module is imported, so a crawl does not pay for
+# the others (and does not need benchmark's Unix-only resource module)
+COMMANDS = {
+    'crawl': 'crawler:run',
+    'enqueue': 'worker:enqueue_main',
+    'worker': 'worker:worker_main',
+    'merge': 'worker:merge_main',
+    'reparse': 'reparse:main',
+    'benchmark': 'benchmark:main',
+    'serve': 'bench_server:main',
+}
+
+
+def load_command(name):
+    module_name, function_name = COMMANDS[name].split(':')
+    return getattr(importlib.import_module(f'.{module_name}', __package__), function_name)
+
+
+def main(argv=None):
+    # 'crawl' is the default, so "python -m bayt_jobs --engine async" works too
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in COMMANDS:
+        return load_command(argv[0])(argv[1:])
+    if argv and argv[0] in ('-h', '--help'):
+        print(f"usage: python -m bayt_jobs [{'|'.join(COMMANDS)}] [options]\n"
+              f"       python -m bayt_jobs <command> --help for the options of each command")
+        return 0
+    return load_command('crawl')(argv)
+
+
+if __name__ == '__main__':
+    result = main()
+    sys.exit(result if isinstance(result, int) else 0)
@@ -0,0 +1,117 @@
+import asyncio
+import time
+
+import aiohttp
+
+from . import crawler
+from .crawler import parse_in_pool, parse_safely, request_headers
+from .rate_limiter import parse_retry_after
+from .retry_scheduler import RETRY_STATUSES, RetryableFetchError
+
+# Detail requests bypass http_pool's sessions, so the aiohttp session's connections are counted here
+connection_stats = {'requests': 0, 'new_connections': 0, 'reused_connections': 0}
+
+
+def connection_trace():
+    trace = aiohttp.TraceConfig()
+
+    async def count(session, context, params, key):
+        connection_stats[key] += 1
+
+    trace.on_request_start.append(lambda *args: count(*args, 'requests'))
+    trace.on_connection_create_end.append(lambda *args: count(*args, 'new_connections'))
+    trace.on_connection_reuseconn.append(lambda *args: count(*args, 'reused_connections'))
+    return trace
+
+
+async def request_page_async(session, semaphore, url, conditional_headers):
+    async with semaphore:
+        await crawler.rate_limiter.acquire_async()
+        crawler.note_first_request()
+        metrics = crawler.metrics
+        start_time = time.perf_counter()
+        try:
+            async with session.get(url, headers=dict(request_headers(), **conditional_headers),
+                                   proxy=crawler.PROXY) as response:
+                status = response.status
+                crawler.rate_limiter.on_response(status, response.headers.get('Retry-After'))
+                content = await response.read() if status == 200 else None
+        except (asyncio.TimeoutError, aiohttp.ClientConnectionError) as e:
+            metrics.inc('http_errors', error=type(e).__name__)
+            raise RetryableFetchError(type(e).__name__) from e
+        finally:
+            metrics.observe('stage_seconds', time.perf_counter() - start_time, stage='detail_fetch')
+        metrics.inc('http_responses', status=status)
+        if content is not None:
+            metrics.inc('bytes_downloaded', len(content))
+    return status, response.headers, content
+
+
+async def fetch_job_page_async(session, semaphore, job_id):
+    # A single attempt, with the same contract as crawler.fetch_job_page
+    url = crawler.JOB_URL.format(job_id=job_id)
+    response_cache = crawler.response_cache
+    content, conditional_headers = None, {}
+    if response_cache is not None:
+        content, conditional_headers = response_cache.lookup(url, 'detail')
+        if content is not None:
+            crawler.archive_page(url, content, 'detail', job_id)
+            return content
+
+    status, headers, content = await request_page_async(session, semaphore, url, conditional_headers)
+    if status == 304:
+        content = response_cache.revalidated(url)
+        if content is not None:
+            crawler.archive_page(url, content, 'detail', job_id)
+            return content
+        # The body went missing underneath the index; a retry would send the same conditional request
+        # and get another 304, so fetch it again unconditionally, as ResponseCache.get does
+        status, headers, content = await request_page_async(session, semaphore, url, {})
+
+    if status == 200:
+        if response_cache is not None:
+            response_cache.store(url, content, headers)
+        crawler.archive_page(url, content, 'detail', job_id)
+        return content
+    elif status in RETRY_STATUSES:
+        raise RetryableFetchError(f"Status code: {status}", parse_retry_after(headers.get('Retry-After'), None))
+
+    print(f"Failed to retrieve data for Job ID: {job_id}. Status code: {status}")
+    crawler.retry_scheduler.record_failure(job_id, f"Status code: {status}")
+    return None
+
+
+async def fetch_data_for_job_id_async(session, semaphore, job_id, parse_pool=None):
+    retry_scheduler = crawler.retry_scheduler
+    attempt = 0
+    while True:
+        try:
+            content = await fetch_job_page_async(session, semaphore, job_id)
+            break
+        except RetryableFetchError as e:
+            delay = retry_scheduler.next_delay(job_id, attempt, e)
+            if delay is None:
+                return {}
+            # Sleeping outside the semaphore leaves the slot to jobs that are ready to go
+            print(f"{e} for Job ID: {job_id}. Retrying in {delay:.1f} seconds...")
+            await asyncio.sleep(delay)
+            attempt += 1
+        except Exception as e:
+            print(f"Error occurred while fetching data for Job ID: {job_id}. {str(e)}")
+            retry_scheduler.record_failure(job_id, e)
+            return {}
+
+    if parse_pool is not None:
+        return await parse_in_pool(parse_pool, content, job_id)
+    return parse_safely(content, job_id)
+
+
+async def fetch_details_async(job_ids, on_result, concurrency=100, parse_pool=None):
+    semaphore = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=crawler.REQUEST_TIMEOUT)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                     trace_configs=[connection_trace()]) as session:
+        tasks = [fetch_data_for_job_id_async(session, semaphore, job_id, parse_pool) for job_id in job_ids]
+        for task in asyncio.as_completed(tasks):
+            on_result(await task)
@@ -0,0 +1,215 @@
+import argparse
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .page_archive import PageArchive
+
+LISTING_PATTERN = re.compile(r'^/en/([a-z-]+)/jobs/\?page=(\d+)$')
+# Every country has its own listing of the same size; Saudi Arabia comes first, so a single-country
+# crawl sees the same job IDs as before. Every CROSS_POSTED-th job on another country's listing is a
+# Saudi job advertised there too.
+COUNTRIES = ['saudi-arabia', 'uae', 'qatar', 'kuwait', 'bahrain', 'oman']
+CROSS_POSTED = 10
+# Share of postings edited between one --revision and the next, for exercising crawl --delta
+REVISION_CHURN = 0.05
+DETAIL_PATTERN = re.compile(r'^/en/job/(\d+)/$')
+
+# Small pools, so generated columns repeat the way the real ones do
+LOCATIONS = ['Riyadh, Saudi Arabia', 'Jeddah, Saudi Arabia', 'Dammam, Saudi Arabia', 'Khobar, Saudi Arabia']
+INDUSTRIES = ['Construction', 'Healthcare', 'IT & Services', 'Oil & Gas', 'Retail', 'Banking']
+EMPLOYMENT_TYPES = ['Full Time', 'Part Time', 'Contract']
+COMPANY_TYPES = ['Employer (Private Sector)', 'Recruitment Agency', 'Employer (Public Sector)']
+DESCRIPTION = ('We are looking for an experienced professional to join our growing team in the Kingdom. '
+               'The successful candidate will work closely with stakeholders across departments. ') * 40
+
+
+class Faults:
+    # What the stand-in server does to each request; probabilities are per request
+    def __init__(self, latency=0.05, jitter=0.5, p429=0.0, retry_after=1, p502=0.0, p_timeout=0.0, hang=5.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.p429 = p429
+        self.retry_after = retry_after
+        self.p502 = p502
+        self.p_timeout = p_timeout
+        self.hang = hang
+
+
+def listing_job_ids(country_index, page, pages, page_size):
+    offset = country_index * pages * page_size
+    first = (page - 1) * page_size + 1
+    return [job_id if country_index == 0 or job_id % CROSS_POSTED else job_id - offset
+            for job_id in range(offset + first, offset + first + page_size)]
+
+
+def listing_page(country_index, page, pages, page_size):
+    country = COUNTRIES[country_index]
+    items = ''.join(f'<li class="has-pointer-d" data-job-id="{job_id}"><h2><a href="/en/job/{job_id}/">Job {job_id}</a>'
+                    f'</h2></li>' for job_id in listing_job_ids(country_index, page, pages, page_size))
+    links = ''.join(f'<li><a href="/en/{country}/jobs/?page={p}">{p}</a></li>' for p in range(1, pages + 1))
+    return (f'<html><body><h1>{pages * page_size:,} jobs in {country.replace("-", " ").title()}</h1><ul>{items}</ul>'
+            f'<ul class="pagination">{links}</ul></body></html>')
+
+
+def detail_page(job_id, revision=0):
+    rng = random.Random(job_id)
+    location, employment_type = rng.choice(LOCATIONS), rng.choice(EMPLOYMENT_TYPES)
+    for edit in range(1, revision + 1):
+        edit_rng = random.Random(f'{job_id}/{edit}')
+        if edit_rng.random() < REVISION_CHURN:
+            employment_type = edit_rng.choice(EMPLOYMENT_TYPES)
+    return (f'<html><head><meta charset="utf-8"></head><body><h1 class="h3 t-bold">Job {job_id}</h1>'
+            f'<dl class="dlist is-spaced is-fitted t-small">'
+            f'<dt>Job Location</dt><dd>{location}</dd>'
+            f'<dt>Employment Type</dt><dd>{employment_type}</dd></dl>'
+            f'<div class="t-break">{DESCRIPTION}</div>'
+            f'<dl class="dlist is-spaced is-fitted t-small">'
+            f'<dt>Company Industry</dt><dd>{rng.choice(INDUSTRIES)}</dd>'
+            f'<dt>Company Type</dt><dd>{rng.choice(COMPANY_TYPES)}</dd></dl></body></html>')
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=b'', headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.count(status)
+
+    def do_GET(self):
+        server = self.server
+        faults = server.faults
+        time.sleep(max(0.0, random.gauss(faults.latency, faults.latency * faults.jitter)))
+
+        roll = random.random()
+        if roll < faults.p_timeout:
+            # Hold the connection past the client's timeout, then drop it without an answer
+            server.count('timeout')
+            time.sleep(faults.hang)
+            self.close_connection = True
+            return
+        roll -= faults.p_timeout
+        if roll < faults.p429:
+            return self._send(429, headers={'Retry-After': str(faults.retry_after)})
+        roll -= faults.p429
+        if roll < faults.p502:
+            return self._send(502)
+
+        body = server.page(self.path)
+        if body is None:
+            return self._send(404)
+        self._send(200, body)
+
+
+class StandInServer(ThreadingHTTPServer):
+    # A local bayt.com: listing pages with li.has-pointer-d items and pagination, and job detail pages.
+    # Pages are generated, or replayed from a page archive recorded with 'crawl --archive'.
+    daemon_threads = True
+
+    def __init__(self, address, pages=10, page_size=20, faults=None, archive_dir=None, revision=0):
+        self.pages = pages
+        self.page_size = page_size
+        self.revision = revision
+        self.faults = faults or Faults()
+        self.archive = PageArchive(archive_dir) if archive_dir else None
+        self.stats = {}
+        self._lock = threading.Lock()
+        # Last: a port already in use raises from here after calling server_close(), which needs self.archive
+        super().__init__(address, StandInHandler)
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def count(self, outcome):
+        with self._lock:
+            self.stats[outcome] = self.stats.get(outcome, 0) + 1
+
+    def page(self, path):
+        match = LISTING_PATTERN.match(path)
+        if match:
+            country, page = match.group(1), int(match.group(2))
+            if country not in COUNTRIES:
+                return None
+            country_index = COUNTRIES.index(country)
+            if self.archive is not None:
+                # Keyed as crawler.listing_key() stores them
+                return self.archive.get_key('listing', page if country_index == 0 else f'{country}/{page}')
+            if 1 <= page <= self.pages:
+                return listing_page(country_index, page, self.pages, self.page_size).encode('utf-8')
+            return None
+        match = DETAIL_PATTERN.match(path)
+        if match:
+            if self.archive is not None:
+                return self.archive.get_key('detail', match.group(1))
+            if int(match.group(1)) <= self.pages * self.page_size * len(COUNTRIES):
+                return detail_page(int(match.group(1)), self.revision).encode('utf-8')
+        return None
+
+    def server_close(self):
+        super().server_close()
+        if self.archive is not None:
+            self.archive.close()
+
+
+def start_server(port=0, **kwargs):
+    # Serves on a background thread; port 0 picks a free port, see server.base_url
+    server = StandInServer(('127.0.0.1', port), **kwargs)
+    threading.Thread(target=server.serve_forever, name='stand-in-server', daemon=True).start()
+    return server
+
+
+def add_server_arguments(parser):
+    parser.add_argument('--pages', type=int, default=10, help='listing pages to generate (default: 10)')
+    parser.add_argument('--page-size', type=int, default=20, help='jobs per listing page (default: 20)')
+    parser.add_argument('--revision', type=int, default=0,
+                        help=f'edit about {REVISION_CHURN * 100:.0f}%% of the postings per revision, to give crawl --delta '
+                             f'something to find (default: 0)')
+    parser.add_argument('--archive-dir', default=None,
+                        help='replay pages recorded with crawl --archive instead of generating them')
+    parser.add_argument('--latency', type=float, default=0.05, help='mean seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.5, help='latency standard deviation, as a fraction of it')
+    parser.add_argument('--p429', type=float, default=0.0, help='share of requests answered 429')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After sent with a 429 (seconds)')
+    parser.add_argument('--p502', type=float, default=0.0, help='share of requests answered 502')
+    parser.add_argument('--p-timeout', type=float, default=0.0, help='share of requests never answered')
+    parser.add_argument('--hang', type=float, default=5.0, help='seconds an unanswered request is held open')
+    parser.add_argument('--seed', type=int, default=None, help='seed for the injected faults')
+
+
+def server_from_args(args, port=0):
+    random.seed(args.seed)
+    faults = Faults(args.latency, args.jitter, args.p429, args.retry_after, args.p502, args.p_timeout, args.hang)
+    return start_server(port, pages=args.pages, page_size=args.page_size, faults=faults, revision=args.revision,
+                        archive_dir=args.archive_dir)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m bayt_jobs serve', description='Serve a local stand-in for bayt.com')
+    parser.add_argument('--port', type=int, default=8000)
+    add_server_arguments(parser)
+    args = parser.parse_args(argv)
+    server = server_from_args(args, args.port)
+    print(f"Serving on {server.base_url}; crawl it with: python -m bayt_jobs crawl --base-url {server.base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from .bench_server import add_server_arguments, server_from_args
+from .crawler import ENGINES
+
+RESULT_PREFIX = 'BENCHMARK_RESULT '
+# Where 'python -m bayt_jobs...' works from
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_child(argv):
+    # One crawl in this process, so peak RSS belongs to this engine and concurrency alone
+    from . import crawler
+    summary = asyncio.run(crawler.main(argv))
+    latencies = crawler.metrics.histogram('stage_seconds', stage='detail_fetch')
+    peak_rss_kb = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                      resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)  # Parse processes, if any
+    result = {
+        'jobs': summary['jobs'],
+        'seconds': summary['seconds'],
+        'requests': latencies.count,
+        'p50': latencies.percentile(50),
+        'p95': latencies.percentile(95),
+        'p99': latencies.percentile(99),
+        'peak_rss_mb': peak_rss_kb / 1024,
+        'retries': crawler.retry_scheduler.stats['retries'],
+        'failed': crawler.retry_scheduler.stats['failed'],
+        'throttled': crawler.rate_limiter.stats['throttled'],
+        'first_request_at': crawler.first_request_at,
+    }
+    print(RESULT_PREFIX + json.dumps(result))
+
+
+def run_case(base_url, engine, concurrency, args):
+    with tempfile.TemporaryDirectory() as output_dir:
+        argv = ['--base-url', base_url, '--output-dir', output_dir, '--engine', engine,
+                '--rate', str(args.rate), '--timeout', str(args.timeout), '--max-attempts', str(args.max_attempts)]
+        if concurrency:
+            argv += ['--concurrency', str(concurrency)]
+        argv += args.scraper_args
+        started_at = time.time()
+        completed = subprocess.run([sys.executable, '-m', 'bayt_jobs.benchmark', '--child', json.dumps(argv)],
+                                   capture_output=True, text=True, cwd=PACKAGE_ROOT)
+    for line in reversed(completed.stdout.splitlines()):
+        if line.startswith(RESULT_PREFIX):
+            result = json.loads(line[len(RESULT_PREFIX):])
+            # Interpreter start, imports and setup, up to the first request leaving
+            result['startup'] = (result['first_request_at'] or started_at) - started_at
+            return result
+    print(completed.stdout[-2000:] + completed.stderr[-2000:])
+    return None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m bayt_jobs benchmark',
+        description='Benchmark the fetch engines against a local bayt.com stand-in server',
+        epilog='Arguments after -- are passed to the crawler, e.g. -- --parse-processes 2')
+    parser.add_argument('--engines', nargs='+', choices=ENGINES, default=list(ENGINES))
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[8, 32],
+                        help='concurrency levels to try; the sequential engine runs once (default: 8 32)')
+    parser.add_argument('--rate', type=float, default=1000.0,
+                        help='scraper rate limit, high by default so the engines are measured (default: 1000)')
+    parser.add_argument('--timeout', type=float, default=2.0, help='scraper request timeout (default: 2)')
+    parser.add_argument('--max-attempts', type=int, default=4)
+    add_server_arguments(parser)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    if argv is None:
+        argv = sys.argv[1:]
+    scraper_args = []
+    if '--' in argv:
+        scraper_args = argv[argv.index('--') + 1:]
+        argv = argv[:argv.index('--')]
+    args = parser.parse_args(argv)
+    args.scraper_args = scraper_args
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.child:
+        return run_child(json.loads(args.child))
+
+    server = server_from_args(args)
+    print(f"Stand-in server on {server.base_url}: {args.pages} pages of {args.page_size} jobs, "
+          f"{args.latency * 1000:.0f}ms latency, {args.p429:.1%} 429s, {args.p502:.1%} 502s, "
+          f"{args.p_timeout:.1%} timeouts.")
+    print(f"{'engine':<11} {'conc':>4} {'jobs':>6} {'jobs/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'RSS MB':>7} {'retries':>7} {'failed':>6} {'start ms':>8}")
+    try:
+        for engine in args.engines:
+            for concurrency in ([None] if engine == 'sequential' else args.concurrency):
+                result = run_case(server.base_url, engine, concurrency, args)
+                if result is None:
+                    print(f"{engine:<11} {concurrency or '-':>4} failed, see the output above")
+                    continue
+                print(f"{engine:<11} {concurrency or '-':>4} {result['jobs']:>6} "
+                      f"{result['jobs'] / max(result['seconds'], 1e-9):>8.1f} {result['p50'] * 1000:>8.1f} "
+                      f"{result['p95'] * 1000:>8.1f} {result['p99'] * 1000:>8.1f} {result['peak_rss_mb']:>7.1f} "
+                      f"{result['retries']:>7} {result['failed']:>6} {result['startup'] * 1000:>8.0f}")
+    finally:
+        server.shutdown()
+        server.server_close()
+        print(f"Server responses: {server.stats}")
+
+
+if __name__ == '__main__':
+    main()
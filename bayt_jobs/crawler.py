@@ -0,0 +1,840 @@
+import argparse
+import functools
+import hashlib
+import heapq
+import os.path
+import queue
+import re
+import requests
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import asyncio
+from collections import deque
+
+from . import http_pool, records
+from .csv_sink import StreamingCsvSink
+from .delta import DELTA_NAME, DeltaTracker
+from .records import DEFAULT_INTERN_MAX_VALUES
+from .parquet_sink import DEFAULT_ROW_GROUP_SIZE, StreamingParquetSink
+from .journal import CrawlJournal, iter_journal_records, load_journal_state
+from .metrics import Metrics
+from .page_archive import DEFAULT_SEGMENT_BYTES, PageArchive
+from .http_cache import DEFAULT_MAX_BYTES, DEFAULT_TTLS, ResponseCache
+from .rate_limiter import DEFAULT_RATE, AdaptiveRateLimiter, parse_retry_after
+from .retry_scheduler import RETRY_STATUSES, RetryableFetchError, RetryScheduler
+from .scheduler import round_robin
+from .seen_store import SeenJobStore, utc_now
+from .extractors import DEFAULT_EXTRACTOR, EXTRACTORS, extract_job_details, get_extractor
+from .user_agents import random_user_agent, use_user_agents
+
+extractor = get_extractor(DEFAULT_EXTRACTOR)
+response_cache = None  # Set by main() when --cache is given
+page_archive = None  # Set by main() when --archive is given
+rate_limiter = AdaptiveRateLimiter(DEFAULT_RATE)  # Shared by every listing and detail request
+retry_scheduler = RetryScheduler()
+metrics = Metrics()  # Stage timings and counters, written to run_stats.json at the end of a run
+
+DIR_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # The checkout, as for the old scripts
+folder_name = "_Output"
+file_name = 'all_job_data.csv'
+NEW_JOBS_NAME = 'new_jobs.csv'  # --incremental output, so the full dataset from the last crawl is kept
+OUTPUT_FORMATS = ('csv', 'parquet', 'both')
+SEEN_DB_NAME = 'seen_jobs.sqlite3'
+CACHE_DIR_NAME = '_cache'
+ARCHIVE_DIR_NAME = '_archive'
+JOURNAL_NAME = 'crawl_journal.jsonl'
+STATS_NAME = 'run_stats.json'
+BASE_URL = 'https://www.bayt.com'
+LISTING_PATH = '/en/{country}/jobs/'
+DEFAULT_COUNTRIES = ['saudi-arabia']
+JOB_URL = BASE_URL + '/en/job/{job_id}/'
+REQUEST_TIMEOUT = 30
+MAX_PAGES = None  # Listing pages to walk at most; None walks to the end
+PROXY = None  # Set by configure() from --proxy
+first_request_at = None  # Wall-clock time the first request went out, for benchmark.py's startup figure
+ENGINES = ('sequential', 'threaded', 'pipelined', 'async')
+RESULT_COUNT_PATTERN = re.compile(r'(\d[\d,]*)\s+jobs\b', re.IGNORECASE)
+PAGE_LINK_PATTERN = re.compile(r'[?&]page=(\d+)')
+LISTING_URL_PATTERN = re.compile(r'/en/([^/]+)/jobs/$')
+
+
+def request_headers():
+    # A fresh dict per request, so concurrent workers never swap each other's User-Agent
+    return {'User-Agent': random_user_agent()}
+
+
+def note_first_request():
+    global first_request_at
+    if first_request_at is None:
+        first_request_at = time.time()
+
+
+def rate_limited_get(url, resource, **kwargs):
+    rate_limiter.acquire()
+    note_first_request()
+    start_time = time.perf_counter()
+    try:
+        response = http_pool.get(url, **kwargs)
+    except Exception as e:
+        metrics.inc('http_errors', error=type(e).__name__)
+        raise
+    finally:
+        metrics.observe('stage_seconds', time.perf_counter() - start_time, stage=f'{resource}_fetch')
+    metrics.inc('http_responses', status=response.status_code)
+    metrics.inc('bytes_downloaded', len(response.content))
+    rate_limiter.on_response(response.status_code, response.headers.get('Retry-After'))
+    return response
+
+
+def http_get(url, resource, **kwargs):
+    # resource is 'listing' or 'detail' and picks the cache TTL; cache hits skip the rate limiter
+    if response_cache is not None:
+        return response_cache.get(url, resource, functools.partial(rate_limited_get, resource=resource), **kwargs)
+    return rate_limited_get(url, resource, **kwargs)
+
+
+def archive_page(url, content, resource, key):
+    if page_archive is not None:
+        page_archive.store(url, content, resource, key)
+
+
+def listing_url(base_url, country):
+    return base_url.rstrip('/') + LISTING_PATH.format(country=country)
+
+
+def listing_key(url, page):
+    # Archive key of a listing page: the page number, prefixed with the country outside Saudi Arabia
+    # so archives recorded before multi-country crawls keep their keys
+    match = LISTING_URL_PATTERN.search(url)
+    country = match.group(1) if match else None
+    return page if country in (None, DEFAULT_COUNTRIES[0]) else f'{country}/{page}'
+
+
+def job_ids_fingerprint(job_ids):
+    return hashlib.blake2b('\n'.join(sorted(job_ids)).encode('utf-8'), digest_size=16).digest()
+
+
+def iter_job_id_pages(url, listing_concurrency=1, start_page=1):
+    # Yields (page, job IDs) for each listing page as soon as it is parsed.
+    # The end of the listing is found from the job IDs rather than the page bytes: each page's ID set is
+    # hashed, and the walk stops at a page whose fingerprint an earlier page already had (bayt keeps
+    # serving the last page past the end). Only the 16-byte fingerprints are kept, not every job ID.
+    # Returns True once that end was reached, False when the walk stopped short of it (a page that could
+    # not be fetched, an error or --max-pages), so callers know whether an unlisted job is really gone.
+    try:
+        if MAX_PAGES and start_page > MAX_PAGES:
+            return False  # A resumed walk that had already reached --max-pages
+        page = start_page
+        page_count = None
+        seen_fingerprints = set()
+
+        while True:
+            response, last_page_reached = goto_next_page(url, page)
+
+            if response is not None:
+                job_ids = extractor.job_ids(response)
+                if not job_ids:
+                    print("No job IDs found.")
+                    return page > 1  # Past the end; an empty first page is more likely a blocked request
+
+                fingerprint = job_ids_fingerprint(job_ids)
+                if fingerprint in seen_fingerprints:
+                    print(f"Reached the last page. Page {page} repeats an earlier page.")
+                    if page_count and page_count > page:
+                        print(f"Stopped {page_count - page} pages before the advertised page count.")
+                        metrics.inc('listing_pages_saved', page_count - page)
+                    return True
+                seen_fingerprints.add(fingerprint)
+
+                print(f"Data extracted from page {page}")  # Statement to be executed after extracting data
+                yield page, job_ids
+                if last_page_reached:
+                    return True  # Break the loop if the last page is reached
+                if MAX_PAGES and page >= MAX_PAGES:
+                    print(f"Stopping at the --max-pages limit of {MAX_PAGES} pages.")
+                    return False
+
+                if page == start_page:
+                    page_count = parse_page_count(response, len(job_ids))
+                    if listing_concurrency > 1 and page_count:
+                        print(f"Found {page_count} listing pages, fetching them {listing_concurrency} at a time.")
+                        last_page = min(page_count, MAX_PAGES) if MAX_PAGES else page_count
+                        complete = yield from iter_job_id_pages_concurrent(
+                            url, range(page + 1, last_page + 1), listing_concurrency, seen_fingerprints)
+                        if not complete:
+                            return False
+                        if MAX_PAGES and last_page >= MAX_PAGES:
+                            print(f"Stopping at the --max-pages limit of {MAX_PAGES} pages.")
+                            return False
+                        # The page count is only an estimate from the advertised total, so the walk carries
+                        # on one page at a time until the listing itself shows its end
+                        page = last_page
+                    elif listing_concurrency > 1:
+                        print(f"Could not read the page count from page {page}. Walking the pages sequentially.")
+
+                page += 1
+            elif last_page_reached:
+                return page > 1  # A 404 past the last page; on the first page the listing itself is missing
+            else:
+                print(f"Failed to fetch data from page {page}. Exiting the loop.")
+                return False
+
+    except Exception as e:
+        print(f"Error occurred: {str(e)}")
+        return False
+
+
+def parse_page_count(content, page_size):
+    # Prefer the total result count; fall back to the highest page linked from the pagination
+    from bs4 import BeautifulSoup  # Deferred so startup does not pay for it
+    soup = BeautifulSoup(content, 'html.parser')
+    counts = [int(count.replace(',', '')) for count in RESULT_COUNT_PATTERN.findall(soup.get_text(' '))]
+    if counts and page_size:
+        return -(-max(counts) // page_size)
+
+    pages = []
+    for link in soup.find_all('a', href=True):
+        match = PAGE_LINK_PATTERN.search(link['href'])
+        if match:
+            pages.append(int(match.group(1)))
+    return max(pages) if pages else None
+
+
+def fetch_listing_page(url, page):
+    # (page, job IDs), with None for a page that could not be fetched
+    response, _ = goto_next_page(url, page)
+    if response is None:
+        print(f"Failed to fetch data from page {page}.")
+        return page, None
+
+    return page, extractor.job_ids(response)
+
+
+def iter_job_id_pages_concurrent(url, pages, listing_concurrency, seen_fingerprints):
+    # Adds each page's fingerprint to seen_fingerprints and returns False if any page failed; a failed
+    # page is not yielded, so a resumed run fetches it again
+    complete = True
+    with ThreadPoolExecutor(max_workers=listing_concurrency) as executor:
+        futures = [executor.submit(fetch_listing_page, url, page) for page in pages]
+        for future in as_completed(futures):
+            page, job_ids = future.result()
+            if job_ids is None:
+                complete = False
+                continue
+            seen_fingerprints.add(job_ids_fingerprint(job_ids))
+            print(f"Data extracted from page {page}")
+            yield page, job_ids
+    return complete
+
+
+def iter_frontier_pages(urls, listing_concurrency=1, start_pages=None, on_listing_done=None):
+    # Yields (country, page, job IDs) from every country's listing at once. Each country is its own
+    # frontier, walked on its own thread, so the walks overlap instead of running one after another;
+    # they all draw on the one rate limiter. start_pages maps a country to the page to resume from,
+    # None when an earlier run already finished its listing. on_listing_done(country, complete) is called
+    # here, on the consuming thread, once a country's last page has been handed on; complete says whether
+    # the walk reached the end of the listing.
+    start_pages = start_pages or {}
+    walks = {country: start_pages.get(country, 1) for country in urls}
+    walks = {country: start_page for country, start_page in walks.items() if start_page is not None}
+    pages = queue.Queue(maxsize=max(1, len(walks)))  # Walkers wait while their pages are handled
+
+    def walk(country, start_page):
+        complete = False
+        try:
+            listing = iter_job_id_pages(urls[country], listing_concurrency, start_page)
+            while True:
+                page, job_ids = next(listing)
+                pages.put((country, page, job_ids))
+        except StopIteration as stop:
+            complete = stop.value is True
+        finally:
+            pages.put((country, None, complete))  # A page of None ends the walk; complete rides in its place
+
+    for country, start_page in walks.items():
+        threading.Thread(target=walk, args=(country, start_page), name=f'listing-{country}', daemon=True).start()
+    remaining = len(walks)
+    while remaining:
+        country, page, job_ids = pages.get()
+        if page is None:
+            remaining -= 1
+            if on_listing_done is not None:
+                on_listing_done(country, job_ids)
+            continue
+        yield country, page, job_ids
+
+
+def fetch_job_ids(url, listing_concurrency=1):
+    all_job_ids = set()
+    for _, job_ids in iter_job_id_pages(url, listing_concurrency):
+        all_job_ids.update(job_ids)
+    return list(all_job_ids)
+
+
+def goto_next_page(url, page):
+    attempt = 0
+    while True:
+        try:
+            response = http_get(url + f'?page={page}', 'listing', headers=request_headers(),
+                                timeout=REQUEST_TIMEOUT)
+
+            if response.status_code == 200:
+                archive_page(url + f'?page={page}', response.content, 'listing', listing_key(url, page))
+                return response.content, False
+            elif response.status_code == 404:
+                print(f"Reached the last page. Stopping data fetching.")
+                return None, True  # Return None and True to indicate the last page
+            elif response.status_code not in RETRY_STATUSES:
+                print(f"Failed to retrieve data from {url} (Page: {page}). Status code: {response.status_code}")
+                return None, False
+            error = RetryableFetchError(f"Status code: {response.status_code}",
+                                        parse_retry_after(response.headers.get('Retry-After'), None))
+
+        except (requests.Timeout, requests.ConnectionError) as e:
+            error = RetryableFetchError(type(e).__name__)
+
+        except Exception as e:
+            print(f"Error occurred while fetching data from {url} (Page: {page}). {str(e)}")
+            return None, False
+
+        delay = retry_scheduler.next_delay(f"{url}?page={page}", attempt, error)
+        if delay is None:
+            print(f"Giving up on {url} (Page: {page}). {error}")
+            return None, False
+        print(f"{error} while fetching data from {url} (Page: {page}). Retrying in {delay:.1f} seconds...")
+        # The listing walk has nothing else to do meanwhile; detail workers run on their own threads
+        time.sleep(delay)
+        attempt += 1
+
+
+def parse_job_details(content, job_id):
+    return extractor.job_details(content, job_id)
+
+
+def fetch_job_page(job_id):
+    # A single attempt that returns the raw detail page, so parsing can happen elsewhere.
+    # Throttled or transient failures raise RetryableFetchError for the engine to reschedule;
+    # None means the page cannot be fetched at all.
+    url = JOB_URL.format(job_id=job_id)
+    try:
+        response = http_get(url, 'detail', headers=request_headers(), timeout=REQUEST_TIMEOUT)
+    except (requests.Timeout, requests.ConnectionError) as e:
+        raise RetryableFetchError(type(e).__name__) from e
+
+    if response.status_code == 200:
+        archive_page(url, response.content, 'detail', job_id)
+        return response.content
+    elif response.status_code in RETRY_STATUSES:
+        raise RetryableFetchError(f"Status code: {response.status_code}",
+                                  parse_retry_after(response.headers.get('Retry-After'), None))
+
+    print(f"Failed to retrieve data for Job ID: {job_id}. Status code: {response.status_code}")
+    retry_scheduler.record_failure(job_id, f"Status code: {response.status_code}")
+    return None
+
+
+def fetch_data_for_job_id(job_id):
+    # RetryableFetchError is left to the caller's retry handling
+    content = fetch_job_page(job_id)
+    return parse_safely(content, job_id)
+
+
+def parse_safely(content, job_id):
+    if content is None:
+        return {}
+    try:
+        with metrics.timer('parse'):
+            return parse_job_details(content, job_id)
+    except Exception as e:
+        print(f"Error occurred while parsing data for Job ID: {job_id}. {str(e)}")
+        retry_scheduler.record_failure(job_id, e)
+        return {}
+
+
+def fetch_details_sequential(job_ids, on_result):
+    # A job waiting to be retried sits in a heap while the next job is fetched
+    pending = deque(job_ids)
+    retries = []
+    while pending or retries:
+        if retries and (not pending or retries[0][0] <= time.monotonic()):
+            due, attempt, job_id = heapq.heappop(retries)
+            time.sleep(max(0.0, due - time.monotonic()))
+        else:
+            job_id, attempt = pending.popleft(), 0
+
+        try:
+            on_result(fetch_data_for_job_id(job_id))
+        except RetryableFetchError as e:
+            delay = retry_scheduler.next_delay(job_id, attempt, e)
+            if delay is None:
+                on_result({})
+            else:
+                print(f"{e} for Job ID: {job_id}. Retrying in {delay:.1f} seconds...")
+                heapq.heappush(retries, (time.monotonic() + delay, attempt + 1, job_id))
+        except Exception as e:
+            print(f"Error occurred while fetching data for Job ID: {job_id}. {str(e)}")
+            retry_scheduler.record_failure(job_id, e)
+            on_result({})
+
+
+def submit_parse(parse_pool, content, job_id):
+    # Timed from submission, so the 'parse_pool' stage includes waiting for a free process
+    start_time = time.perf_counter()
+    future = parse_pool.submit(extract_job_details, content, job_id, extractor.name)
+    future.add_done_callback(lambda future: metrics.observe('stage_seconds', time.perf_counter() - start_time,
+                                                            stage='parse_pool'))
+    return future
+
+
+async def parse_in_pool(parse_pool, content, job_id):
+    if content is None:
+        return {}
+    try:
+        return await asyncio.wrap_future(submit_parse(parse_pool, content, job_id))
+    except Exception as e:
+        print(f"Error occurred while parsing data for Job ID: {job_id}. {str(e)}")
+        retry_scheduler.record_failure(job_id, e)
+        return {}
+
+
+async def fetch_with_retries(executor, parse_pool, job_id):
+    loop = asyncio.get_event_loop()
+    # Without a parse pool the page is parsed on the thread that fetched it: a parse handed back to the
+    # executor would queue behind every fetch still waiting there, and nothing would reach the sinks
+    # until the last page had downloaded
+    fetch = fetch_job_page if parse_pool is not None else fetch_data_for_job_id
+    attempt = 0
+    while True:
+        try:
+            result = await loop.run_in_executor(executor, fetch, job_id)
+            break
+        except RetryableFetchError as e:
+            delay = retry_scheduler.next_delay(job_id, attempt, e)
+            if delay is None:
+                return {}
+            print(f"{e} for Job ID: {job_id}. Retrying in {delay:.1f} seconds...")
+            await asyncio.sleep(delay)  # No worker thread is held while waiting
+            attempt += 1
+        except Exception as e:
+            print(f"Error occurred while fetching data for Job ID: {job_id}. {str(e)}")
+            retry_scheduler.record_failure(job_id, e)
+            return {}
+
+    if parse_pool is not None:
+        # Threads only download; the bytes go to the process pool so parsing is not serialised by the GIL
+        return await parse_in_pool(parse_pool, result, job_id)
+    return result
+
+
+async def fetch_details_threaded(job_ids, on_result, concurrency=None, parse_pool=None):
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [fetch_with_retries(executor, parse_pool, job_id) for job_id in job_ids]
+        for future in asyncio.as_completed(futures):
+            on_result(await future)
+
+
+async def fetch_details(job_ids, on_result, engine='threaded', concurrency=None, parse_pool=None):
+    # Each record is handed to on_result as soon as it is ready rather than collected into a list
+    if engine == 'sequential':
+        return fetch_details_sequential(job_ids, on_result)
+    elif engine == 'threaded':
+        return await fetch_details_threaded(job_ids, on_result, concurrency, parse_pool)
+    elif engine == 'async':
+        from .async_engine import fetch_details_async  # aiohttp is only needed for this engine
+        return await fetch_details_async(job_ids, on_result, concurrency or 100, parse_pool)
+    raise ValueError(f"Unknown engine: {engine}")
+
+
+def open_sinks(csv_path, output_format='csv', row_group_size=DEFAULT_ROW_GROUP_SIZE, registry=None):
+    # Output path -> sink; every record goes to all of them
+    sinks = {}
+    if output_format in ('csv', 'both'):
+        sinks[csv_path] = StreamingCsvSink(csv_path, registry=registry)
+    if output_format in ('parquet', 'both'):
+        parquet_path = os.path.splitext(csv_path)[0] + '.parquet'
+        sinks[parquet_path] = StreamingParquetSink(parquet_path, row_group_size, registry=registry)
+    return sinks
+
+
+def parse_countries(value):
+    countries = [country.strip().strip('/') for country in value.split(',') if country.strip()]
+    if not countries:
+        raise argparse.ArgumentTypeError('expected at least one country')
+    return list(dict.fromkeys(countries))
+
+
+def add_detail_arguments(parser, engines=ENGINES):
+    # Options of the commands that fetch job details (crawl, worker)
+    parser.add_argument('--engine', choices=engines, default='threaded',
+                        help='how job detail pages are fetched (default: threaded)')
+    parser.add_argument('--concurrency', type=int, default=None,
+                        help='max detail requests in flight (default: executor default, 100 for async)')
+    parser.add_argument('--parse-processes', type=int, default=0,
+                        help='parse detail pages in this many worker processes instead of the fetching threads '
+                             '(default: 0, parse in place)')
+    parser.add_argument('--prometheus', default=None, metavar='PATH',
+                        help=f'also write the run metrics in Prometheus text format '
+                             f'(they always go to {folder_name}/{STATS_NAME})')
+
+
+def add_listing_arguments(parser):
+    # Options of the commands that walk the listings (crawl, enqueue)
+    parser.add_argument('--max-pages', type=int, default=None,
+                        help='stop the listing walk after this many pages (default: walk to the last page)')
+    parser.add_argument('--countries', type=parse_countries, default=DEFAULT_COUNTRIES,
+                        help='comma-separated bayt.com country slugs to crawl in one run, e.g. '
+                             'saudi-arabia,uae,qatar,kuwait; jobs listed in several are fetched once '
+                             f'(default: {",".join(DEFAULT_COUNTRIES)})')
+    parser.add_argument('--listing-concurrency', type=int, default=1,
+                        help='listing pages fetched at once after reading the page count from page 1 '
+                             '(default: 1, a sequential walk)')
+
+
+def add_fetch_arguments(parser):
+    # Options of every command that requests pages from the site
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                        help=f'request budget per second shared by listing and detail fetches (default: {DEFAULT_RATE}); '
+                             'halved on 429/502 and recovered gradually')
+    parser.add_argument('--burst', type=int, default=None,
+                        help='requests allowed back to back after an idle spell (default: the rate)')
+    parser.add_argument('--timeout', type=float, default=REQUEST_TIMEOUT,
+                        help=f'seconds before a request is abandoned and retried (default: {REQUEST_TIMEOUT})')
+    parser.add_argument('--proxy', default=None, metavar='URL',
+                        help='send every request through this HTTP(S) proxy, e.g. to give each worker '
+                             'its own egress IP (default: none, or the usual *_PROXY environment variables)')
+    parser.add_argument('--user-agents', default=None, metavar='FILE',
+                        help='rotate through the User-Agents in this file, one per line '
+                             '(default: the list bundled with the package)')
+    parser.add_argument('--max-attempts', type=int, default=4,
+                        help='attempts per page before it is reported as permanently failed (default: 4)')
+    parser.add_argument('--parser', choices=EXTRACTORS, default=DEFAULT_EXTRACTOR,
+                        help=f'HTML extraction backend (default: {DEFAULT_EXTRACTOR})')
+    parser.add_argument('--base-url', default=BASE_URL,
+                        help='site to crawl, e.g. a local stand-in from "python -m bayt_jobs serve" (default: %(default)s)')
+    parser.add_argument('--output-dir', default=None,
+                        help=f'where the output files and stores go (default: {folder_name} next to this script)')
+    parser.add_argument('--archive', action='store_true',
+                        help='keep every fetched listing and detail page in a compressed, indexed archive '
+                             'so extractor fixes can be re-run without a re-crawl')
+    parser.add_argument('--archive-dir', default=None,
+                        help=f'page archive directory (default: {folder_name}/{ARCHIVE_DIR_NAME})')
+    parser.add_argument('--archive-segment-mb', type=int, default=DEFAULT_SEGMENT_BYTES // (1024 * 1024),
+                        help='start a new archive segment file beyond this size')
+    parser.add_argument('--cache', action='store_true',
+                        help='serve recently fetched pages from an on-disk cache and revalidate stale ones')
+    parser.add_argument('--cache-dir', default=None,
+                        help=f'response cache directory (default: {folder_name}/{CACHE_DIR_NAME})')
+    parser.add_argument('--cache-size-mb', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help='evict least recently used pages beyond this size')
+    parser.add_argument('--listing-ttl', type=int, default=DEFAULT_TTLS['listing'],
+                        help='seconds a cached listing page is served without revalidation')
+    parser.add_argument('--detail-ttl', type=int, default=DEFAULT_TTLS['detail'],
+                        help='seconds a cached job detail page is served without revalidation')
+
+
+def add_output_arguments(parser):
+    # Options of the commands that write the dataset (crawl, merge, reparse)
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='csv',
+                        help='write the CSV, a Parquet file with dictionary-encoded columns, or both (default: csv)')
+    parser.add_argument('--row-group-size', type=int, default=DEFAULT_ROW_GROUP_SIZE,
+                        help=f'rows buffered per Parquet row group (default: {DEFAULT_ROW_GROUP_SIZE})')
+    parser.add_argument('--intern-max-values', type=int, default=DEFAULT_INTERN_MAX_VALUES,
+                        help=f'share repeated field values in memory for columns with up to this many distinct '
+                             f'values; 0 turns it off (default: {DEFAULT_INTERN_MAX_VALUES})')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m bayt_jobs crawl', description='Scrape job postings from bayt.com')
+    add_detail_arguments(parser)
+    add_listing_arguments(parser)
+    parser.add_argument('--queue-size', type=int, default=1000,
+                        help='job IDs buffered between listing and detail workers in the pipelined engine')
+    add_fetch_arguments(parser)
+    add_output_arguments(parser)
+    parser.add_argument('--incremental', action='store_true',
+                        help=f'only fetch details for job IDs not scraped by an earlier run, writing them to '
+                             f'{NEW_JOBS_NAME} instead of {file_name}, and mark IDs that are no longer listed '
+                             f'as closed')
+    parser.add_argument('--delta', action='store_true',
+                        help=f'fetch every listed job but write only the ones that are new, changed or removed '
+                             f'since the last --delta run to {DELTA_NAME}, naming the changed fields; '
+                             f'fingerprints are kept in the seen-jobs database')
+    parser.add_argument('--seen-db', default=None,
+                        help=f'job ID store used by --incremental (default: {folder_name}/{SEEN_DB_NAME})')
+    parser.add_argument('--resume', action='store_true',
+                        help=f'continue an interrupted crawl from {folder_name}/{JOURNAL_NAME}, '
+                             'fetching only the jobs and listing pages it had not finished')
+    return parser
+
+
+def parse_args(argv=None):
+    return build_parser().parse_args(argv)
+
+
+def configure(args, path):
+    # Run settings shared by every command that fetches pages (crawl, enqueue, worker);
+    # path is where this process keeps its cache and archive. enqueue and worker take fewer options
+    # and set defaults for the ones they leave out.
+    global extractor, response_cache, page_archive, rate_limiter, retry_scheduler, metrics, JOB_URL, REQUEST_TIMEOUT, \
+        MAX_PAGES, PROXY
+    extractor = get_extractor(args.parser)
+    rate_limiter = AdaptiveRateLimiter(args.rate, args.burst)
+    retry_scheduler = RetryScheduler(args.max_attempts)
+    metrics = Metrics()
+    urls = {country: listing_url(args.base_url, country) for country in args.countries}
+    JOB_URL = args.base_url.rstrip('/') + '/en/job/{job_id}/'
+    REQUEST_TIMEOUT = args.timeout
+    MAX_PAGES = args.max_pages
+    PROXY = args.proxy
+    if args.user_agents:
+        use_user_agents(args.user_agents)
+    # One pooled keep-alive session per worker thread; listing pages reuse them too
+    workers = args.concurrency or http_pool.DEFAULT_POOL_SIZE
+    listing_threads = len(urls) * args.listing_concurrency  # Every country's listing is walked at once
+    if args.engine == 'pipelined':
+        pool_size = workers + listing_threads
+    elif args.engine == 'threaded':
+        pool_size = max(workers, listing_threads)
+    else:
+        pool_size = listing_threads
+    http_pool.configure_session_pool(pool_size, PROXY)
+
+    os.makedirs(path, exist_ok=True)
+    if args.cache:
+        response_cache = ResponseCache(args.cache_dir or os.path.join(path, CACHE_DIR_NAME),
+                                       args.cache_size_mb * 1024 * 1024,
+                                       {'listing': args.listing_ttl, 'detail': args.detail_ttl})
+
+    if args.archive:
+        page_archive = PageArchive(args.archive_dir or os.path.join(path, ARCHIVE_DIR_NAME),
+                                   args.archive_segment_mb * 1024 * 1024)
+    return urls
+
+
+def close_stores():
+    if response_cache is not None:
+        stats = response_cache.stats
+        print(f"Response cache: {stats['hits']} hits, {stats['revalidated']} revalidated, "
+              f"{stats['misses']} misses, {stats['evicted']} evicted.")
+        response_cache.close()
+    if page_archive is not None:
+        stats = page_archive.stats
+        ratio = stats['stored_bytes'] / stats['raw_bytes'] if stats['raw_bytes'] else 0
+        print(f"Page archive: {stats['pages']} pages stored, {stats['unchanged']} unchanged pages skipped, "
+              f"{stats['raw_bytes'] / 1024 / 1024:.1f} MiB of HTML in {stats['stored_bytes'] / 1024 / 1024:.1f} MiB "
+              f"({ratio:.0%}).")
+        page_archive.close()
+
+
+async def main(argv=None):
+    args = parse_args(argv)
+    if args.incremental and args.delta:
+        print("--delta has to fetch jobs seen before to compare them; it cannot be combined with --incremental.")
+        return {'jobs': 0, 'seconds': 0.0}
+    path = args.output_dir or os.path.join(DIR_PATH, folder_name)
+    urls = configure(args, path)
+    records.columns.intern_max_values = args.intern_max_values
+    workers = args.concurrency or http_pool.DEFAULT_POOL_SIZE
+    use_seen_store = args.incremental or args.delta
+    seen_store = SeenJobStore(args.seen_db or os.path.join(path, SEEN_DB_NAME)) if use_seen_store else None
+    run_started_at = utc_now()
+    # In delta mode the output is the change rows, which have columns of their own
+    delta = DeltaTracker(seen_store) if args.delta else None
+    registry = records.columns if delta is None else delta.registry
+    if delta is not None:
+        csv_path = os.path.join(path, DELTA_NAME)
+    else:
+        # The new jobs alone must not take the place of the full dataset
+        csv_path = os.path.join(path, NEW_JOBS_NAME if args.incremental else file_name)
+    sinks = open_sinks(csv_path, args.format, args.row_group_size, registry)
+    sink = next(iter(sinks.values()))
+
+    journal_path = os.path.join(path, JOURNAL_NAME)
+    resume_state = None
+    if args.resume and os.path.exists(journal_path):
+        resume_state = load_journal_state(journal_path)
+        for record in iter_journal_records(journal_path):
+            record = registry.record(record)
+            for output in sinks.values():
+                output.write(record)
+        print(f"Resuming: {len(resume_state.done_job_ids)} jobs already saved, "
+              f"{len(resume_state.missing_job_ids)} listed jobs still to fetch.")
+    elif args.resume:
+        print(f"No journal found at '{journal_path}'. Starting a new crawl.")
+    journal = CrawlJournal(journal_path, append=resume_state is not None)
+    if resume_state is not None and resume_state.started_at:
+        # Jobs the interrupted run listed were seen during this crawl, not before it
+        run_started_at = resume_state.started_at
+    else:
+        journal.start(run_started_at)
+
+    start_pages = {country: 1 for country in urls}
+    initial_job_ids = {}
+    done_job_ids = set()
+    complete_listings = set()  # Countries whose listing was walked to its end, so unlisted jobs there are gone
+    if resume_state is not None:
+        # A listing the interrupted run walked to its end is not walked again; one it stopped short on is
+        # picked up where it left off
+        start_pages = {country: None if country in resume_state.listing_complete else resume_state.next_page(country)
+                       for country in urls}
+        initial_job_ids = resume_state.missing_job_ids
+        done_job_ids = resume_state.done_job_ids
+        complete_listings.update(resume_state.listing_complete)
+    job_countries = dict(initial_job_ids)  # Job ID -> the country whose listing brought it in first
+
+    def on_listing_page(country, page, job_ids):
+        # A job advertised in several countries is fetched once, for the first listing that shows it
+        job_ids = set(job_ids) - done_job_ids - job_countries.keys()
+        job_countries.update(dict.fromkeys(job_ids, country))
+        if seen_store is not None:
+            seen_store.mark_seen(job_ids, run_started_at, country)
+        # In incremental mode only postings without scraped details are fetched
+        if args.incremental:
+            job_ids = set(seen_store.filter_unfetched(job_ids))
+        journal.page(page, job_ids, country)
+        return job_ids
+
+    def on_listing_done(country, complete):
+        journal.listing_done(country, complete)
+        if complete:
+            complete_listings.add(country)
+
+    def write(row):
+        # Compact once here; every sink and the journal share the same record
+        row = registry.record(row)
+        for output in sinks.values():
+            output.write(row)
+        if row:
+            journal.record(row.to_dict())
+
+    def on_result(result):
+        with metrics.timer('write'):
+            row, fingerprint = result, None
+            if delta is not None:
+                # Unchanged jobs and failed fetches leave no row; the fingerprint is stored after the row
+                row, fingerprint = delta.compare(result) if result else (None, None)
+            if row is not None:
+                write(row)
+            if seen_store is not None and result:
+                seen_store.mark_fetched(result['Job ID'], fingerprint=fingerprint)
+
+    parse_pool = ProcessPoolExecutor(max_workers=args.parse_processes) if args.parse_processes > 0 else None
+    start_time = time.perf_counter()
+    try:
+        if args.engine == 'pipelined':
+            from .pipeline import run_pipeline
+            run_pipeline(urls, on_result, workers, args.queue_size, args.listing_concurrency, parse_pool,
+                         on_listing_page, start_pages, initial_job_ids, on_listing_done)
+        else:
+            job_ids = set(initial_job_ids)
+            for country, page, page_job_ids in iter_frontier_pages(urls, args.listing_concurrency, start_pages,
+                                                                   on_listing_done):
+                job_ids.update(on_listing_page(country, page, page_job_ids))
+            if args.incremental:
+                print(f"{len(job_ids)} listed jobs are new.")
+            if len(urls) > 1:
+                print(f"{len(job_countries)} distinct jobs listed across {len(urls)} countries.")
+            if job_ids:
+                # Countries take turns, so each gets its share of the request budget from the start
+                await fetch_details(round_robin(job_ids, job_countries.get), on_result, args.engine,
+                                    args.concurrency, parse_pool)
+
+        # Only a listing walked to its end shows which of its jobs are gone; after a failed or cut-short
+        # walk every job it did not reach would look taken down. Countries left out of this run are not
+        # touched either.
+        if seen_store is not None:
+            walked = [country for country in urls if country in complete_listings]
+            if walked:
+                closed = seen_store.close_missing(run_started_at, walked)
+                print(f"Marked {len(closed)} jobs no longer listed as closed.")
+                if delta is not None:
+                    for job_id in closed:
+                        write(delta.removed(job_id))
+            if len(walked) < len(urls):
+                print(f"Not every listing was walked to its end, so no jobs were marked as closed in "
+                      f"{', '.join(country for country in urls if country not in complete_listings)}.")
+    finally:
+        if parse_pool is not None:
+            parse_pool.shutdown()
+        if seen_store is not None:
+            seen_store.close()
+        journal.close()
+        close_stores()
+
+    elapsed = time.perf_counter() - start_time
+    if delta is None:
+        jobs = sink.rows
+    else:
+        jobs = delta.stats['new'] + delta.stats['changed'] + delta.stats['unchanged']
+    if jobs:
+        print(f"Fetched {jobs} job details in {elapsed:.1f}s using the {args.engine} engine.")
+        stats = http_pool.connection_stats()
+        # The async engine fetches details on its own aiohttp session; the pooled sessions only do listings
+        label = "Listing connections" if args.engine == 'async' else "HTTP connections"
+        print(f"{label}: {stats['new_connections']} opened, {stats['reused_connections']} reused "
+              f"across {stats['requests']} requests.")
+        if args.engine == 'async':
+            from .async_engine import connection_stats
+            stats = connection_stats
+            print(f"Detail connections (aiohttp): {stats['new_connections']} opened, "
+                  f"{stats['reused_connections']} reused across {stats['requests']} requests.")
+        stats = rate_limiter.stats
+        print(f"Rate limiter: {stats['throttled']} throttled responses, {stats['decreases']} slow-downs, "
+              f"{stats['waited']:.1f}s spent waiting, ending at {rate_limiter.rate:.2f} requests/s.")
+        print(f"Retries: {retry_scheduler.stats['retries']}.")
+        stats = journal.stats
+        print(f"Journal: {stats['entries']} entries, {stats['bytes'] / 1024:.0f} KiB, {stats['fsyncs']} fsyncs, "
+              f"{stats['seconds']:.2f}s ({stats['seconds'] / elapsed:.1%} of the run).")
+    else:
+        print("No new job IDs found." if args.incremental else "No job IDs found.")
+
+    # A delta run always replaces its change file, even with nothing in it: the removals it recorded are
+    # in there, and the previous run's changes must not be read a second time
+    if jobs or delta is not None:
+        # Save to CSV / Parquet
+        try:
+            for output_path, output in sinks.items():
+                output.close()
+                print(f"Data has been successfully saved to '{output_path}'.")
+            os.remove(journal_path)  # Nothing left to resume
+        except Exception as e:
+            print(f"Error occurred while saving the output: {str(e)}")
+
+    else:
+        for output in sinks.values():
+            output.discard()
+        os.remove(journal_path)
+    retry_scheduler.report()
+    if delta is not None:
+        delta.report()
+        for change, count in delta.stats.items():
+            metrics.set('changes', count, change=change)
+    records.columns.intern_report()
+
+    metrics.set('jobs_written', jobs)
+    metrics.set('run_seconds', elapsed)
+    metrics.set('retries', retry_scheduler.stats['retries'])
+    metrics.set('failed_requests', retry_scheduler.stats['failed'])
+    for name, value in rate_limiter.stats.items():
+        metrics.set(f'rate_limiter_{name}', value)
+    for name, value in records.columns.intern_stats().items():
+        metrics.set(f'intern_{name}', value)
+    if response_cache is not None:
+        for name, value in response_cache.stats.items():
+            metrics.set('cache', value, outcome=name)
+    metrics.report()
+    stats_path = os.path.join(path, STATS_NAME)
+    metrics.write_json(stats_path)
+    print(f"Run metrics saved to '{stats_path}'.")
+    if args.prometheus:
+        metrics.write_prometheus(args.prometheus)
+    return {'jobs': jobs, 'seconds': elapsed}
+
+
+def run(argv=None):
+    return asyncio.run(main(argv))
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,65 @@
+import csv
+import json
+import os
+
+from . import records
+from .records import order_columns
+
+
+class StreamingCsvSink:
+    # Rows go to disk as they arrive instead of being held until the crawl ends.
+    # Columns are the slots of the shared column registry, numbered in the order their dt label is
+    # first seen, so a row only needs the columns known when it was written; the sidecar schema
+    # file records that order. close() streams the body into the final CSV with the usual
+    # 'Job ID', 'Job Name', sorted header.
+
+    def __init__(self, csv_path, flush_every=100, registry=None):
+        self.csv_path = csv_path
+        self.body_path = csv_path + '.part'
+        self.schema_path = csv_path + '.schema.json'
+        self.flush_every = flush_every
+        self.registry = registry or records.columns
+        self._schema_width = 0
+        self.rows = 0
+        self._body = open(self.body_path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._body)
+        self._write_schema()
+
+    def _write_schema(self):
+        self._schema_width = len(self.registry)
+        with open(self.schema_path, 'w', encoding='utf-8') as f:
+            json.dump(self.registry.columns[:self._schema_width], f, ensure_ascii=False)
+
+    def write(self, record):
+        record = self.registry.record(record)
+        if not record:
+            return  # A failed fetch, as in the Parquet sink
+        if record.max_slot >= self._schema_width:
+            self._write_schema()
+
+        self._writer.writerow(record.row(self._schema_width))
+        self.rows += 1
+        if self.rows % self.flush_every == 0:
+            self._body.flush()
+
+    def close(self):
+        self._body.close()
+        columns = self.registry.columns[:self._schema_width]
+        field_names = order_columns(columns, self.registry.leading)
+        positions = [self.registry.slot(name) for name in field_names]
+
+        with open(self.body_path, newline='', encoding='utf-8') as body, \
+                open(self.csv_path, 'w', newline='', encoding='utf-8-sig') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(field_names)
+            for row in csv.reader(body):
+                row += [''] * (len(columns) - len(row))
+                writer.writerow([row[position] for position in positions])
+
+        os.remove(self.body_path)
+        os.remove(self.schema_path)
+
+    def discard(self):
+        self._body.close()
+        os.remove(self.body_path)
+        os.remove(self.schema_path)
@@ -0,0 +1,73 @@
+import hashlib
+import json
+import re
+
+from .records import ColumnRegistry
+
+DELTA_NAME = 'job_changes.csv'
+CHANGE_COLUMNS = ['Change', 'Changed Fields', 'Job ID', 'Job Name']
+WHITESPACE = re.compile(r'\s+')
+
+
+def normalise(record):
+    # Two fetches of an unchanged posting can still differ in whitespace and in empty fields
+    fields = {}
+    for name, value in record.items():
+        name = WHITESPACE.sub(' ', name).strip()
+        value = WHITESPACE.sub(' ', str(value)).strip()
+        if name and value:
+            fields[name] = value
+    return fields
+
+
+def digest(text):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def fingerprint(record):
+    # (digest of the whole record, {field: digest of its value}); the field digests are what
+    # let a later run name the fields that changed without keeping the values themselves
+    field_digests = {name: digest(value) for name, value in normalise(record).items()}
+    return digest(json.dumps(sorted(field_digests.items()))), field_digests
+
+
+def changed_fields(old_digests, new_digests):
+    return sorted(name for name in old_digests.keys() | new_digests.keys()
+                  if old_digests.get(name) != new_digests.get(name))
+
+
+class DeltaTracker:
+    # Compares each fetched record with the fingerprint the seen store kept from the last run and
+    # turns it into a change row: new, changed (with the fields that differ) or nothing at all.
+    # Change rows have their own columns, so they get their own registry and sinks.
+
+    def __init__(self, seen_store):
+        self.seen_store = seen_store
+        self.registry = ColumnRegistry(CHANGE_COLUMNS, intern_max_values=0)
+        self.stats = {'new': 0, 'changed': 0, 'unchanged': 0, 'removed': 0}
+
+    def compare(self, record):
+        # (change row or None, fingerprint to store once the row is written)
+        record_digest, field_digests = fingerprint(record)
+        previous = self.seen_store.fingerprint(record['Job ID'])
+        if previous is None:
+            change, changed = 'new', []
+        elif previous[0] == record_digest:
+            self.stats['unchanged'] += 1
+            return None, (record_digest, field_digests)
+        else:
+            change, changed = 'changed', changed_fields(previous[1], field_digests)
+        self.stats[change] += 1
+        row = dict(record)
+        row['Change'] = change
+        row['Changed Fields'] = '; '.join(changed)
+        return row, (record_digest, field_digests)
+
+    def removed(self, job_id):
+        self.stats['removed'] += 1
+        return {'Change': 'removed', 'Job ID': job_id}
+
+    def report(self):
+        stats = self.stats
+        print(f"Changes: {stats['new']} new, {stats['changed']} changed, {stats['removed']} removed, "
+              f"{stats['unchanged']} unchanged.")
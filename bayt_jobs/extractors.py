@@ -0,0 +1,145 @@
+import sys
+import time
+
+JOB_LIST_CLASS = 'has-pointer-d'
+JOB_NAME_CLASS = 'h3'
+JOB_DETAILS_CLASS = 'dlist is-spaced is-fitted t-small'
+
+
+def has_class(class_name):
+    # A SoupStrainer sees the raw attribute ("  has-pointer-d\n is-featured"), not the class list find_all() does
+    return lambda value: bool(value) and class_name in value.split()
+
+
+class BeautifulSoupExtractor:
+    # Reference backend: parses the whole page with html.parser, exactly as the scripts always have
+    name = 'bs4'
+    strained = False
+
+    def soup(self, content, parse_only=None, from_encoding=None):
+        from bs4 import BeautifulSoup  # Deferred until the first page is parsed, like lxml below
+        return BeautifulSoup(content, 'html.parser', parse_only=parse_only, from_encoding=from_encoding)
+
+    def strainer(self, *args, **kwargs):
+        if not self.strained:
+            return None
+        from bs4 import SoupStrainer
+        return SoupStrainer(*args, **kwargs)
+
+    def job_ids(self, content):
+        soup = self.soup(content, self.strainer('li', class_=has_class(JOB_LIST_CLASS)))
+        job_elements = soup.find_all('li', class_=JOB_LIST_CLASS)
+        return {job_element.get("data-job-id") for job_element in job_elements if job_element.get("data-job-id")}
+
+    def job_details(self, content, job_id):
+        soup = self.soup(content, self.strainer(['h1', 'dl']), from_encoding='utf-8')
+        details_desc_mapping = {}
+
+        # Extract the job name and add it to the dictionary
+        job_name_element = soup.find('h1', class_=JOB_NAME_CLASS)
+        job_name = job_name_element.text.strip() if job_name_element else ''
+        details_desc_mapping['Job ID'] = job_id
+        details_desc_mapping['Job Name'] = job_name
+
+        job_elements = soup.find_all('dl', class_=JOB_DETAILS_CLASS)
+
+        for job_element in job_elements:
+            job_attributes = job_element.find_all('dt')
+            job_desc = job_element.find_all('dd')
+
+            for title, data in zip(job_attributes, job_desc):
+                title_name = title.text.strip()
+                data_text = data.text.strip()
+                details_desc_mapping[title_name] = data_text
+
+        return details_desc_mapping
+
+
+class StrainedSoupExtractor(BeautifulSoupExtractor):
+    # Same tree walk, but html.parser only builds the li / h1 / dl subtrees we read
+    name = 'bs4-strained'
+    strained = True
+
+
+class LxmlExtractor:
+    # libxml2 parser with XPath lookups; no Python objects are built for the rest of the page
+    name = 'lxml'
+
+    def __init__(self):
+        from lxml import html  # Optional dependency, only needed when this backend is selected
+        self._html = html
+        self._parser = html.HTMLParser(encoding='utf-8')
+        self._job_ids_xpath = self._class_xpath('//li', JOB_LIST_CLASS) + '/@data-job-id'
+        self._job_name_xpath = self._class_xpath('//h1', JOB_NAME_CLASS)
+        self._job_details_xpath = f"//dl[normalize-space(@class)='{JOB_DETAILS_CLASS}']"
+
+    @staticmethod
+    def _class_xpath(path, class_name):
+        return f"{path}[contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')]"
+
+    def job_ids(self, content):
+        document = self._html.document_fromstring(content)
+        return {job_id for job_id in document.xpath(self._job_ids_xpath) if job_id}
+
+    def job_details(self, content, job_id):
+        document = self._html.document_fromstring(content, parser=self._parser)
+        details_desc_mapping = {}
+
+        job_name_elements = document.xpath(self._job_name_xpath)
+        details_desc_mapping['Job ID'] = job_id
+        details_desc_mapping['Job Name'] = job_name_elements[0].text_content().strip() if job_name_elements else ''
+
+        for job_element in document.xpath(self._job_details_xpath):
+            for title, data in zip(job_element.iter('dt'), job_element.iter('dd')):
+                details_desc_mapping[title.text_content().strip()] = data.text_content().strip()
+
+        return details_desc_mapping
+
+
+EXTRACTORS = {
+    BeautifulSoupExtractor.name: BeautifulSoupExtractor,
+    StrainedSoupExtractor.name: StrainedSoupExtractor,
+    LxmlExtractor.name: LxmlExtractor,
+}
+DEFAULT_EXTRACTOR = BeautifulSoupExtractor.name
+
+_extractors = {}
+
+
+def get_extractor(name=DEFAULT_EXTRACTOR):
+    if name not in _extractors:
+        if name not in EXTRACTORS:
+            raise ValueError(f"Unknown extractor: {name}")
+        _extractors[name] = EXTRACTORS[name]()
+    return _extractors[name]
+
+
+def extract_job_details(content, job_id, name=DEFAULT_EXTRACTOR):
+    # Module-level entry point so a ProcessPoolExecutor can pickle it
+    return get_extractor(name).job_details(content, job_id)
+
+
+def compare_extractors(paths, names=tuple(EXTRACTORS)):
+    # Checks every backend produces the same record as the reference for saved detail pages
+    reference = get_extractor(DEFAULT_EXTRACTOR)
+    timings = dict.fromkeys(names, 0.0)
+    mismatches = 0
+    for path in paths:
+        with open(path, 'rb') as f:
+            content = f.read()
+        expected = reference.job_details(content, path)
+        for name in names:
+            start_time = time.perf_counter()
+            record = get_extractor(name).job_details(content, path)
+            timings[name] += time.perf_counter() - start_time
+            if record != expected:
+                mismatches += 1
+                print(f"{name} differs from {DEFAULT_EXTRACTOR} on {path}: {record} != {expected}")
+
+    for name, elapsed in timings.items():
+        print(f"{name}: {elapsed:.3f}s for {len(paths)} pages")
+    return mismatches
+
+
+if __name__ == '__main__':
+    sys.exit(1 if compare_extractors(sys.argv[1:]) else 0)
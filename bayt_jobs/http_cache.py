@@ -0,0 +1,172 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+'''
+
+DEFAULT_TTLS = {
+    'listing': 10 * 60,  # Listing pages change as postings come and go
+    'detail': 24 * 60 * 60,
+}
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+EVICT_BATCH = 100  # Entries read per query while evicting, instead of the whole index
+
+
+class CachedResponse:
+    # Just enough of requests.Response for the fetchers
+    def __init__(self, content, headers=None):
+        self.status_code = 200
+        self.content = content
+        self.headers = headers or {}
+
+
+class ResponseCache:
+    # Bodies live in files under cache_dir, metadata in a SQLite index next to them.
+    # Fresh entries are served without a request, stale ones are revalidated with
+    # If-None-Match / If-Modified-Since, and the least recently used bodies are evicted
+    # once the cache grows past max_bytes.
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES, ttls=None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'stored': 0, 'evicted': 0}
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._connection = sqlite3.connect(os.path.join(cache_dir, 'index.sqlite3'), check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.executescript(SCHEMA)
+        self._connection.commit()
+        self.total_bytes = self._connection.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+
+    @staticmethod
+    def _key(url):
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+    def _body_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def _read_body(self, key):
+        try:
+            with open(self._body_path(key), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def lookup(self, url, resource):
+        # Returns (fresh content or None, headers for a conditional request)
+        key = self._key(url)
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT etag, last_modified, fetched_at FROM entries WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None, {}
+
+        etag, last_modified, fetched_at = row
+        now = time.time()
+        if now - fetched_at < self.ttls[resource]:
+            content = self._read_body(key)
+            if content is not None:
+                with self._lock:
+                    self._connection.execute('UPDATE entries SET last_access = ? WHERE key = ?', (now, key))
+                    self._connection.commit()
+                    self.stats['hits'] += 1
+                return content, {}
+
+        conditional_headers = {}
+        if etag:
+            conditional_headers['If-None-Match'] = etag
+        if last_modified:
+            conditional_headers['If-Modified-Since'] = last_modified
+        return None, conditional_headers
+
+    def revalidated(self, url):
+        # The server answered 304: the stored body is current again
+        key = self._key(url)
+        content = self._read_body(key)
+        now = time.time()
+        with self._lock:
+            self._connection.execute('UPDATE entries SET fetched_at = ?, last_access = ? WHERE key = ?',
+                                     (now, now, key))
+            self._connection.commit()
+            self.stats['revalidated'] += 1
+        return content
+
+    def store(self, url, content, response_headers):
+        key = self._key(url)
+        path = self._body_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(content)
+
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute('SELECT size FROM entries WHERE key = ?', (key,)).fetchone()
+            self.total_bytes += len(content) - (row[0] if row else 0)
+            self._connection.execute(
+                'INSERT OR REPLACE INTO entries (key, url, etag, last_modified, fetched_at, last_access, size) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key, url, response_headers.get('ETag'), response_headers.get('Last-Modified'), now, now,
+                 len(content)))
+            self.stats['misses'] += 1
+            self.stats['stored'] += 1
+            self._evict()
+            self._connection.commit()
+
+    def _evict(self):
+        # The oldest entries come off the last_access index a batch at a time
+        while self.total_bytes > self.max_bytes:
+            rows = self._connection.execute('SELECT key, size FROM entries ORDER BY last_access LIMIT ?',
+                                            (EVICT_BATCH,)).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if self.total_bytes <= self.max_bytes:
+                    break
+                self._connection.execute('DELETE FROM entries WHERE key = ?', (key,))
+                try:
+                    os.remove(self._body_path(key))
+                except FileNotFoundError:
+                    pass
+                self.total_bytes -= size
+                self.stats['evicted'] += 1
+
+    def get(self, url, resource, fetch, **kwargs):
+        content, conditional_headers = self.lookup(url, resource)
+        if content is not None:
+            return CachedResponse(content)
+
+        if conditional_headers:
+            kwargs['headers'] = dict(kwargs.get('headers') or {}, **conditional_headers)
+        response = fetch(url, **kwargs)
+        if response.status_code == 304:
+            content = self.revalidated(url)
+            if content is not None:
+                return CachedResponse(content, response.headers)
+            # The body went missing underneath the index; fetch it again unconditionally
+            kwargs['headers'] = {name: value for name, value in kwargs['headers'].items()
+                                 if name not in conditional_headers}
+            response = fetch(url, **kwargs)
+        if response.status_code == 200:
+            self.store(url, response.content, response.headers)
+        else:
+            with self._lock:
+                self.stats['misses'] += 1
+        return response
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,88 @@
+import os
+import queue
+import threading
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Same worker count ThreadPoolExecutor picks when max_workers is not given
+DEFAULT_POOL_SIZE = min(32, (os.cpu_count() or 1) + 4)
+
+
+class SessionPool:
+    def __init__(self, size=DEFAULT_POOL_SIZE, proxy=None):
+        self.size = size
+        self._sessions = []
+        self._idle = queue.LifoQueue()  # LIFO hands out the session with the warmest connection first
+        for _ in range(size):
+            session = requests.Session()
+            # A session is only ever used by one thread at a time, so one kept-alive connection per host is enough
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=1)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            if proxy:
+                session.proxies.update({'http': proxy, 'https': proxy})
+            self._sessions.append(session)
+            self._idle.put(session)
+
+    @contextmanager
+    def session(self):
+        session = self._idle.get()
+        try:
+            yield session
+        finally:
+            self._idle.put(session)
+
+    def get(self, url, **kwargs):
+        with self.session() as session:
+            return session.get(url, **kwargs)
+
+    def connection_stats(self):
+        requests_sent = 0
+        new_connections = 0
+        for session in self._sessions:
+            for adapter in set(session.adapters.values()):
+                pools = adapter.poolmanager.pools
+                for key in pools.keys():
+                    requests_sent += pools[key].num_requests
+                    new_connections += pools[key].num_connections
+        return {
+            'requests': requests_sent,
+            'new_connections': new_connections,
+            'reused_connections': requests_sent - new_connections,
+        }
+
+    def close(self):
+        for session in self._sessions:
+            session.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def configure_session_pool(size, proxy=None):
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        _pool = SessionPool(size, proxy)
+    return _pool
+
+
+def get_session_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = SessionPool()
+    return _pool
+
+
+def get(url, **kwargs):
+    return get_session_pool().get(url, **kwargs)
+
+
+def connection_stats():
+    return get_session_pool().connection_stats()
@@ -0,0 +1,137 @@
+import json
+import os
+import threading
+import time
+
+
+class JournalState:
+    # What an interrupted run had finished, rebuilt from its journal
+    # Listing progress is kept per country; journals from before multi-country crawls have no
+    # country on their entries, so their listings are walked again (finished jobs are still skipped)
+    def __init__(self):
+        self.pages = {}  # Country -> finished listing pages
+        self.listed_job_ids = {}  # Job ID -> country whose listing it came from
+        self.done_job_ids = set()
+        self.listing_complete = set()  # Countries whose listing walk reached the end of the listing
+        self.started_at = None  # When the interrupted run began, so a resumed run keeps its listing times
+
+    def next_page(self, country):
+        # Pages are journaled as they complete, which is out of order when they are fetched concurrently
+        pages = self.pages.get(country, ())
+        page = 1
+        while page in pages:
+            page += 1
+        return page
+
+    @property
+    def missing_job_ids(self):
+        return {job_id: country for job_id, country in self.listed_job_ids.items()
+                if job_id not in self.done_job_ids}
+
+
+def iter_journal_entries(path):
+    # (entry, offset just past its line) up to the first line a crash left half written; every entry is
+    # written with its newline in one go, so a line without one is torn even if it happens to parse
+    offset = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            if not line.endswith(b'\n'):
+                return
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                return
+            offset += len(line)
+            yield entry, offset
+
+
+def iter_journal(path):
+    for entry, _ in iter_journal_entries(path):
+        yield entry
+
+
+def intact_length(path):
+    length = 0
+    for _, length in iter_journal_entries(path):
+        pass
+    return length
+
+
+def load_journal_state(path):
+    state = JournalState()
+    for entry in iter_journal(path):
+        if entry['type'] == 'page':
+            country = entry.get('country')
+            state.pages.setdefault(country, set()).add(entry['page'])
+            state.listed_job_ids.update(dict.fromkeys(entry['job_ids'], country))
+        elif entry['type'] == 'record':
+            state.done_job_ids.add(entry['record']['Job ID'])
+        elif entry['type'] == 'listing_done':
+            if entry.get('complete'):
+                state.listing_complete.add(entry.get('country'))
+        elif entry['type'] == 'start':
+            state.started_at = entry['started_at']
+    return state
+
+
+def iter_journal_records(path):
+    for entry in iter_journal(path):
+        if entry['type'] == 'record':
+            yield entry['record']
+
+
+class CrawlJournal:
+    # Append-only JSONL log of finished listing pages and job records.
+    # Writes are flushed to the OS straight away but fsynced in batches (every fsync_every entries
+    # or fsync_interval seconds), which bounds what a power cut can lose without an fsync per job.
+
+    def __init__(self, path, append=False, fsync_every=100, fsync_interval=1.0):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.stats = {'entries': 0, 'bytes': 0, 'fsyncs': 0, 'seconds': 0.0}
+        self._lock = threading.Lock()
+        if append and os.path.exists(path):
+            # Cut off a torn last line, or the first new entry would run on from it and be unreadable too
+            with open(path, 'r+b') as f:
+                f.truncate(intact_length(path))
+        self._file = open(path, 'a' if append else 'w', encoding='utf-8')
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _append(self, entry):
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        with self._lock:
+            start_time = time.perf_counter()
+            self._file.write(line)
+            self._file.flush()
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync()
+            self.stats['entries'] += 1
+            self.stats['bytes'] += len(line)
+            self.stats['seconds'] += time.perf_counter() - start_time
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self.stats['fsyncs'] += 1
+
+    def start(self, started_at):
+        self._append({'type': 'start', 'started_at': started_at})
+
+    def page(self, page, job_ids, country):
+        self._append({'type': 'page', 'country': country, 'page': page, 'job_ids': sorted(job_ids)})
+
+    def record(self, record):
+        self._append({'type': 'record', 'record': record})
+
+    def listing_done(self, country, complete):
+        self._append({'type': 'listing_done', 'country': country, 'complete': complete})
+
+    def close(self):
+        with self._lock:
+            if self._unsynced:
+                self._sync()
+            self._file.close()
@@ -0,0 +1,169 @@
+import bisect
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds, 1ms to ~2 minutes in steps of ~26%, so percentiles read from the buckets are within a step
+TIME_BUCKETS = tuple(round(0.001 * 10 ** (i / 10), 6) for i in range(52))
+# Items waiting in a queue
+DEPTH_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+PROMETHEUS_PREFIX = 'bayt_'
+
+
+class Histogram:
+    def __init__(self, buckets=TIME_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # The last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def percentile(self, q):
+        # Upper bound of the bucket holding the q-th percentile, capped by the largest value seen
+        if not self.count:
+            return 0.0
+        rank = math.ceil(q / 100 * self.count)
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self.buckets[i], self.max) if i < len(self.buckets) else self.max
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min if self.count else 0.0,
+            'max': self.max if self.count else 0.0,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'buckets': {str(bound): count for bound, count in zip(self.buckets + ('+Inf',), self.counts) if count},
+        }
+
+
+def _key(name, labels):
+    return name, tuple(sorted((label, str(value)) for label, value in labels.items()))
+
+
+def _series_name(name, labels):
+    if not labels:
+        return name
+    return name + '{' + ','.join(f'{label}={value}' for label, value in labels) + '}'
+
+
+def _prometheus_labels(labels, extra=()):
+    labels = tuple(labels) + tuple(extra)
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{label}="{value}"' for label, value in labels) + '}'
+
+
+class Metrics:
+    # Counters, gauges and histograms for one run, keyed by name and labels.
+    # Stage timings go to the 'stage_seconds' histogram with a stage label (listing_fetch, detail_fetch,
+    # parse, write, ...), so the report shows where the time of a slow run went.
+    # inc() counts events as they happen; set() records a value read off at the end of the run
+    # (run_seconds, jobs_written, the rate limiter's state), which is a gauge, not a counter.
+
+    def __init__(self):
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, amount=1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self.gauges[_key(name, labels)] = value
+
+    def observe(self, name, value, buckets=TIME_BUCKETS, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def histogram(self, name, **labels):
+        return self.histograms.get(_key(name, labels)) or Histogram()
+
+    @contextmanager
+    def timer(self, stage):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('stage_seconds', time.perf_counter() - start_time, stage=stage)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'counters': {_series_name(name, labels): value
+                             for (name, labels), value in sorted(self.counters.items())},
+                'gauges': {_series_name(name, labels): value
+                           for (name, labels), value in sorted(self.gauges.items())},
+                'histograms': {_series_name(name, labels): histogram.to_dict()
+                               for (name, labels), histogram in sorted(self.histograms.items())},
+            }
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def write_prometheus(self, path):
+        # Text exposition format, e.g. for the node_exporter textfile collector
+        lines = []
+        typed = set()  # One TYPE line per metric family
+        with self._lock:
+            for (name, labels), value in sorted(self.counters.items()):
+                metric = f'{PROMETHEUS_PREFIX}{name}_total'
+                if metric not in typed:
+                    typed.add(metric)
+                    lines.append(f'# TYPE {metric} counter')
+                lines.append(f'{metric}{_prometheus_labels(labels)} {value}')
+            for (name, labels), value in sorted(self.gauges.items()):
+                metric = PROMETHEUS_PREFIX + name
+                if metric not in typed:
+                    typed.add(metric)
+                    lines.append(f'# TYPE {metric} gauge')
+                lines.append(f'{metric}{_prometheus_labels(labels)} {value}')
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                metric = PROMETHEUS_PREFIX + name
+                if metric not in typed:
+                    typed.add(metric)
+                    lines.append(f'# TYPE {metric} histogram')
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{_prometheus_labels(labels, [("le", bound)])} {cumulative}')
+                lines.append(f'{metric}_sum{_prometheus_labels(labels)} {histogram.sum}')
+                lines.append(f'{metric}_count{_prometheus_labels(labels)} {histogram.count}')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+
+    def report(self):
+        # Where the time went, busiest stage first
+        stages = [(dict(labels)['stage'], histogram) for (name, labels), histogram in self.histograms.items()
+                  if name == 'stage_seconds']
+        if not stages:
+            return
+        print("Stage          count    total s    p50 ms    p95 ms    p99 ms")
+        for stage, histogram in sorted(stages, key=lambda item: -item[1].sum):
+            print(f"{stage:<13} {histogram.count:>6} {histogram.sum:>10.1f} {histogram.percentile(50) * 1000:>9.1f} "
+                  f"{histogram.percentile(95) * 1000:>9.1f} {histogram.percentile(99) * 1000:>9.1f}")
@@ -0,0 +1,153 @@
+import gzip
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+import uuid
+
+from .seen_store import utc_now
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    resource TEXT NOT NULL,
+    key TEXT,
+    fetched_at TEXT NOT NULL,
+    segment INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    digest TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_by_url ON pages (url, id);
+CREATE INDEX IF NOT EXISTS pages_by_key ON pages (resource, key, id);
+'''
+
+DEFAULT_SEGMENT_BYTES = 1024 * 1024 * 1024
+
+
+def read_record(segment_path, offset, length):
+    # Decompresses the one gzip member at offset and returns the page body inside it
+    with open(segment_path, 'rb') as f:
+        f.seek(offset)
+        record = gzip.decompress(f.read(length))
+    header, _, body = record.partition(b'\r\n\r\n')
+    for line in header.split(b'\r\n'):
+        name, _, value = line.partition(b':')
+        if name == b'Content-Length':
+            return body[:int(value)]
+    return body[:-4]
+
+
+class PageArchive:
+    # Every fetched page body is appended to a segment file as its own gzip member holding a
+    # WARC 'resource' record, so segments are valid .warc.gz files that only ever grow.
+    # A SQLite index maps URL, job ID / page number and fetch time to (segment, offset, length):
+    # a lookup seeks straight to one member and decompresses only that page.
+    # A page whose body has not changed since it was last archived is not stored again.
+
+    def __init__(self, archive_dir, segment_bytes=DEFAULT_SEGMENT_BYTES, compresslevel=6):
+        self.archive_dir = archive_dir
+        self.segment_bytes = segment_bytes
+        self.compresslevel = compresslevel
+        self.stats = {'pages': 0, 'unchanged': 0, 'raw_bytes': 0, 'stored_bytes': 0}
+        self._lock = threading.Lock()
+        os.makedirs(archive_dir, exist_ok=True)
+        self._connection = sqlite3.connect(os.path.join(archive_dir, 'index.sqlite3'), check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.executescript(SCHEMA)
+        self._connection.commit()
+        self.segment = self._connection.execute('SELECT COALESCE(MAX(segment), 0) FROM pages').fetchone()[0]
+        self._segment_file = open(self._segment_path(self.segment), 'ab')
+
+    def _segment_path(self, segment):
+        return os.path.join(self.archive_dir, f'segment-{segment:05d}.warc.gz')
+
+    def _record(self, url, content, fetched_at):
+        header = (f'WARC/1.0\r\n'
+                  f'WARC-Type: resource\r\n'
+                  f'WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>\r\n'
+                  f'WARC-Target-URI: {url}\r\n'
+                  f'WARC-Date: {fetched_at}\r\n'
+                  f'Content-Type: text/html\r\n'
+                  f'Content-Length: {len(content)}\r\n\r\n')
+        return gzip.compress(header.encode('utf-8') + content + b'\r\n\r\n', compresslevel=self.compresslevel)
+
+    def store(self, url, content, resource, key=None):
+        # resource is 'listing' or 'detail'; key is the job ID or listing page number
+        digest = hashlib.sha1(content).hexdigest()
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT digest FROM pages WHERE url = ? ORDER BY id DESC LIMIT 1', (url,)).fetchone()
+            if row is not None and row[0] == digest:
+                self.stats['unchanged'] += 1
+                return
+
+            fetched_at = utc_now()
+            member = self._record(url, content, fetched_at)
+            if self._segment_file.tell() and self._segment_file.tell() + len(member) > self.segment_bytes:
+                self._segment_file.close()
+                self.segment += 1
+                self._segment_file = open(self._segment_path(self.segment), 'ab')
+            offset = self._segment_file.tell()
+            self._segment_file.write(member)
+            self._segment_file.flush()
+
+            self._connection.execute(
+                'INSERT INTO pages (url, resource, key, fetched_at, segment, offset, length, size, digest) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (url, resource, None if key is None else str(key), fetched_at, self.segment, offset, len(member),
+                 len(content), digest))
+            self._connection.commit()
+            self.stats['pages'] += 1
+            self.stats['raw_bytes'] += len(content)
+            self.stats['stored_bytes'] += len(member)
+
+    def _get(self, where, params):
+        with self._lock:
+            row = self._connection.execute(
+                f'SELECT segment, offset, length FROM pages WHERE {where} ORDER BY id DESC LIMIT 1',
+                params).fetchone()
+        if row is None:
+            return None
+        segment, offset, length = row
+        return read_record(self._segment_path(segment), offset, length)
+
+    def get(self, url, fetched_before=None):
+        # The newest copy of url, or the newest one fetched before the given UTC timestamp
+        if fetched_before is None:
+            return self._get('url = ?', (url,))
+        return self._get('url = ? AND fetched_at < ?', (url, fetched_before))
+
+    def get_key(self, resource, key):
+        return self._get('resource = ? AND key = ?', (resource, str(key)))
+
+    def iter_latest(self, resource):
+        # (key, segment path, offset, length) of the newest copy of every page of one kind,
+        # in file order so reading them back is sequential
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT key, segment, offset, length FROM pages '
+                'WHERE id IN (SELECT MAX(id) FROM pages WHERE resource = ? GROUP BY key) '
+                'ORDER BY segment, offset', (resource,)).fetchall()
+        for key, segment, offset, length in rows:
+            yield key, self._segment_path(segment), offset, length
+
+    def close(self):
+        with self._lock:
+            self._segment_file.close()
+            self._connection.close()
+
+
+if __name__ == '__main__':
+    # python -m bayt_jobs.page_archive ARCHIVE_DIR JOB_ID_OR_URL  -> prints the newest archived copy
+    archive = PageArchive(sys.argv[1])
+    target = sys.argv[2]
+    content = archive.get(target) if '://' in target else archive.get_key('detail', target)
+    archive.close()
+    if content is None:
+        sys.exit(f"'{target}' is not in the archive.")
+    sys.stdout.buffer.write(content)
@@ -0,0 +1,100 @@
+import os
+import shutil
+
+from . import records
+from .records import order_columns
+
+DEFAULT_ROW_GROUP_SIZE = 10000
+# Unique per row, so a dictionary would only add overhead
+PLAIN_COLUMNS = ('Job ID',)
+
+
+class StreamingParquetSink:
+    # Columnar output for analytics: every column is a dictionary-encoded, compressed string column,
+    # so the heavily repeated values (Location, Industry, Employment Type, ...) are stored once per
+    # row group and readers can load just the columns they ask for.
+    # Rows are buffered into row groups of row_group_size and written as each one fills. A Parquet
+    # file has a fixed schema, so a record bringing a new column finishes the current part file and
+    # starts another; close() merges the parts, row group by row group, into one file whose column
+    # order matches the CSV.
+
+    def __init__(self, parquet_path, row_group_size=DEFAULT_ROW_GROUP_SIZE, compression='zstd', registry=None):
+        import pyarrow  # Optional dependency, only needed when Parquet output is selected
+        import pyarrow.parquet
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self.parquet_path = parquet_path
+        self.parts_path = parquet_path + '.parts'
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.registry = registry or records.columns
+        self.columns = self.registry.columns[:]
+        self.rows = 0
+        self._buffer = []
+        self._writer = None
+        self._parts = []
+        shutil.rmtree(self.parts_path, ignore_errors=True)
+        os.makedirs(self.parts_path)
+
+    def _schema(self, columns):
+        return self._pa.schema([(name, self._pa.string()) for name in columns])
+
+    def _open_writer(self, path, columns):
+        return self._pq.ParquetWriter(path, self._schema(columns), compression=self.compression,
+                                      use_dictionary=[name for name in columns if name not in PLAIN_COLUMNS])
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        if self._writer is None:
+            path = os.path.join(self.parts_path, f'part-{len(self._parts):05d}.parquet')
+            self._writer = self._open_writer(path, self.columns)
+            self._parts.append(path)
+        table = self._pa.table({name: [record.get_slot(slot) for record in self._buffer]
+                                for slot, name in enumerate(self.columns)},
+                               schema=self._schema(self.columns))
+        self._writer.write_table(table, row_group_size=len(self._buffer))
+        self._buffer = []
+
+    def _finish_part(self):
+        self._flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def write(self, record):
+        record = self.registry.record(record)
+        if not record:
+            return
+        if record.max_slot >= len(self.columns):
+            self._finish_part()
+            self.columns = self.registry.columns[:]
+
+        self._buffer.append(record)
+        self.rows += 1
+        if len(self._buffer) >= self.row_group_size:
+            self._flush()
+
+    def close(self):
+        self._finish_part()
+        field_names = order_columns(self.columns, self.registry.leading)
+        writer = self._open_writer(self.parquet_path, field_names)
+        try:
+            for path in self._parts:
+                part = self._pq.ParquetFile(path)
+                for i in range(part.num_row_groups):
+                    table = part.read_row_group(i)
+                    # Columns found after this part was written are null in it
+                    for name in field_names:
+                        if name not in table.column_names:
+                            table = table.append_column(name, self._pa.nulls(table.num_rows, self._pa.string()))
+                    writer.write_table(table.select(field_names))
+        finally:
+            writer.close()
+        shutil.rmtree(self.parts_path)
+
+    def discard(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        shutil.rmtree(self.parts_path)
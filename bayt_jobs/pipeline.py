@@ -0,0 +1,144 @@
+import threading
+
+from . import crawler
+from .crawler import fetch_job_page, iter_frontier_pages, parse_safely, submit_parse
+from .metrics import DEPTH_BUCKETS
+from .retry_scheduler import RetryableFetchError
+from .scheduler import FairQueue
+
+_DONE = object()
+
+
+def run_pipeline(urls, on_result, workers, queue_size=1000, listing_concurrency=1, parse_pool=None,
+                 on_listing_page=None, start_pages=None, initial_job_ids=None, on_listing_done=None):
+    # Listing pages feed a bounded queue that detail workers drain while later pages are still loading.
+    # A full queue blocks the listing threads, so memory is capped at queue_size pending job IDs.
+    # urls maps each country to its listing; the queue hands out one job per country in turn.
+    # Jobs waiting to be retried are parked with the retry scheduler, not in a worker.
+    job_queue = FairQueue(maxsize=queue_size)
+    result_lock = threading.Lock()
+    retry_scheduler = crawler.retry_scheduler
+    stats = {'queued': 0, 'fetched': 0, 'max_depth': 0}
+    # Jobs queued but not yet delivered, including those waiting for a retry or a parse process
+    outstanding = [0]
+    all_delivered = threading.Condition()
+    # The first exception from on_result or the listing walk; the run winds down and re-raises it
+    errors = []
+
+    def fail(e):
+        with all_delivered:
+            if not errors:
+                errors.append(e)
+
+    def enqueue(country, job_ids):
+        for job_id in job_ids:
+            if errors:
+                return
+            with all_delivered:
+                outstanding[0] += 1
+            job_queue.put((country, (job_id, 0)))
+            stats['queued'] += 1
+            stats['max_depth'] = max(stats['max_depth'], job_queue.qsize())
+            crawler.metrics.observe('queue_depth', job_queue.qsize(), DEPTH_BUCKETS, queue='pipeline')
+
+    def produce():
+        # initial_job_ids (job ID -> country) were listed by an earlier, interrupted run;
+        # a start page of None means that run had finished the country's listing
+        initial = initial_job_ids or {}
+        seen_job_ids = set(initial)
+        try:
+            for job_id, country in initial.items():
+                enqueue(country, [job_id])
+            for country, page, job_ids in iter_frontier_pages(urls, listing_concurrency, start_pages,
+                                                              on_listing_done):
+                if errors:
+                    break
+                new_job_ids = job_ids - seen_job_ids
+                seen_job_ids.update(job_ids)
+                if on_listing_page is not None:
+                    new_job_ids = on_listing_page(country, page, new_job_ids)
+                enqueue(country, new_job_ids)
+        except Exception as e:
+            fail(e)
+
+    # Caps pages waiting for a parse process, so slow parsing pushes back on the detail workers too
+    parse_slots = threading.BoundedSemaphore(queue_size)
+
+    def settle():
+        with all_delivered:
+            outstanding[0] -= 1
+            all_delivered.notify_all()
+
+    def deliver(result):
+        # Settled even when on_result fails, or the main thread would wait for this job forever
+        try:
+            with result_lock:
+                if errors:
+                    return  # Nothing more is written once a write has failed
+                stats['fetched'] += 1
+                on_result(result)
+        except Exception as e:
+            fail(e)
+        finally:
+            settle()
+
+    def deliver_parsed(future, job_id):
+        try:
+            result = future.result()
+        except Exception as e:
+            print(f"Error occurred while parsing data for Job ID: {job_id}. {str(e)}")
+            retry_scheduler.record_failure(job_id, e)
+            result = {}
+        parse_slots.release()
+        deliver(result)
+
+    def consume():
+        while True:
+            country, item = job_queue.get()
+            if item is _DONE:
+                return
+            if errors:
+                settle()  # The run is failing; what is still queued is dropped, not fetched
+                continue
+            job_id, attempt = item
+
+            try:
+                content = fetch_job_page(job_id)
+            except RetryableFetchError as e:
+                delay = retry_scheduler.next_delay(job_id, attempt, e)
+                if delay is not None:
+                    print(f"{e} for Job ID: {job_id}. Retrying in {delay:.1f} seconds...")
+                    entry = (country, (job_id, attempt + 1))
+                    retry_scheduler.call_later(delay, lambda entry=entry: job_queue.put(entry))
+                    continue
+                content = None
+            except Exception as e:
+                print(f"Error occurred while fetching data for Job ID: {job_id}. {str(e)}")
+                retry_scheduler.record_failure(job_id, e)
+                content = None
+
+            if content is None or parse_pool is None:
+                deliver(parse_safely(content, job_id))
+                continue
+            parse_slots.acquire()
+            future = submit_parse(parse_pool, content, job_id)
+            future.add_done_callback(lambda future, job_id=job_id: deliver_parsed(future, job_id))
+
+    producer = threading.Thread(target=produce, name='listing')
+    consumers = [threading.Thread(target=consume, name=f'detail-{i}') for i in range(workers)]
+    for thread in [producer] + consumers:
+        thread.start()
+
+    producer.join()
+    with all_delivered:
+        all_delivered.wait_for(lambda: outstanding[0] == 0)
+    for _ in range(workers):
+        job_queue.put((None, _DONE))
+    for thread in consumers:
+        thread.join()
+    if errors:
+        raise errors[0]
+
+    print(f"Pipeline queued {stats['queued']} job IDs, fetched {stats['fetched']} details "
+          f"(peak queue depth {stats['max_depth']} of {queue_size}).")
+    return stats
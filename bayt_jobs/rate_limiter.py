@@ -0,0 +1,69 @@
+import asyncio
+import threading
+import time
+
+DEFAULT_RATE = 5.0
+THROTTLE_STATUSES = (429, 502, 503)
+
+
+def parse_retry_after(value, default=5):
+    try:
+        return max(0, int(value))
+    except (TypeError, ValueError):
+        return default
+
+
+class AdaptiveRateLimiter:
+    # One token bucket for every listing and detail request in the process.
+    # A throttling answer from any worker halves the rate for everyone (at most once per
+    # cooldown, so a burst of 429s from requests already in flight counts once) and a
+    # Retry-After pauses every worker; each success then adds the rate back in small steps.
+
+    def __init__(self, rate=DEFAULT_RATE, burst=None, min_rate=0.2, increase=0.05, decrease=0.5, cooldown=2.0):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self.min_rate = min_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.stats = {'requests': 0, 'throttled': 0, 'decreases': 0, 'waited': 0.0}
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+
+    def _reserve(self):
+        with self._lock:
+            now = time.monotonic()
+            # Unused capacity accumulates up to burst requests
+            start = max(self._next_slot, now - (self.burst - 1) / self.rate, self._paused_until)
+            self._next_slot = start + 1 / self.rate
+            wait = max(0.0, start - now)
+            self.stats['requests'] += 1
+            self.stats['waited'] += wait
+            return wait
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        wait = self._reserve()
+        if wait:
+            await asyncio.sleep(wait)
+
+    def on_response(self, status, retry_after=None):
+        with self._lock:
+            now = time.monotonic()
+            if status in THROTTLE_STATUSES:
+                self.stats['throttled'] += 1
+                if now - self._last_decrease >= self.cooldown:
+                    self.rate = max(self.min_rate, self.rate * self.decrease)
+                    self._last_decrease = now
+                    self.stats['decreases'] += 1
+                if retry_after is not None or status == 429:
+                    self._paused_until = max(self._paused_until, now + parse_retry_after(retry_after))
+            elif status < 400:
+                self.rate = min(self.max_rate, self.rate + self.increase)
@@ -0,0 +1,153 @@
+import sys
+import threading
+
+LEADING_COLUMNS = ['Job ID', 'Job Name']
+# Distinct values a column may have and still be interned; past this it is treated as free text
+DEFAULT_INTERN_MAX_VALUES = 2000
+
+
+def order_columns(field_names, leading=LEADING_COLUMNS):
+    return list(leading) + sorted(set(field_names) - set(leading))
+
+
+class ValueDictionary:
+    # The distinct values of one column. Every record holding "Riyadh, Saudi Arabia" then points at
+    # the same string instead of its own copy from the parser. A column that keeps producing new
+    # values (descriptions, titles) hits max_values, drops its dictionary and is left alone.
+    __slots__ = ('values', 'hits', 'saved_bytes', 'capped')
+
+    def __init__(self):
+        self.values = {}
+        self.hits = 0
+        self.saved_bytes = 0
+        self.capped = False
+
+    def intern(self, value, max_values):
+        if self.capped or not isinstance(value, str):
+            return value
+        existing = self.values.get(value)
+        if existing is not None:
+            if existing is not value:
+                self.hits += 1
+                self.saved_bytes += sys.getsizeof(value)
+            return existing
+        if len(self.values) >= max_values:
+            self.capped = True
+            self.values = {}
+            return value
+        self.values[value] = value
+        return value
+
+
+class ColumnRegistry:
+    # Maps each dt label to an integer slot the first time it is seen; slots never change,
+    # so a record only has to remember slot numbers, not label strings
+    def __init__(self, columns=LEADING_COLUMNS, intern_max_values=DEFAULT_INTERN_MAX_VALUES):
+        self.columns = []
+        self.leading = list(columns)  # Output files start with these, the rest follow sorted
+        self.intern_max_values = intern_max_values  # 0 turns interning off
+        self._slots = {}
+        self._dictionaries = []
+        self._lock = threading.Lock()
+        for name in columns:
+            self.slot(name)
+
+    def __len__(self):
+        return len(self.columns)
+
+    def slot(self, name):
+        slot = self._slots.get(name)
+        if slot is None:
+            with self._lock:
+                slot = self._slots.get(name)
+                if slot is None:
+                    slot = self._slots[name] = len(self.columns)
+                    self._dictionaries.append(ValueDictionary())
+                    self.columns.append(name)
+        return slot
+
+    def record(self, mapping):
+        # A JobRecord from an extractor's dict (or a record replayed from the journal)
+        if isinstance(mapping, JobRecord):
+            return mapping
+        pairs = sorted((self.slot(name), value) for name, value in mapping.items())
+        slots = tuple(slot for slot, _ in pairs)
+        if self.intern_max_values:
+            values = tuple(self._dictionaries[slot].intern(value, self.intern_max_values) for slot, value in pairs)
+        else:
+            values = tuple(value for _, value in pairs)
+        return JobRecord(self, slots, values)
+
+    def intern_stats(self):
+        interned = [(name, d) for name, d in zip(self.columns, self._dictionaries) if not d.capped]
+        return {
+            'interned_columns': len(interned),
+            'free_text_columns': len(self.columns) - len(interned),
+            'distinct_values': sum(len(d.values) for _, d in interned),
+            'hits': sum(d.hits for d in self._dictionaries),
+            'saved_bytes': sum(d.saved_bytes for d in self._dictionaries),
+        }
+
+    def intern_report(self):
+        stats = self.intern_stats()
+        if not self.intern_max_values:
+            return
+        print(f"Value interning: {stats['hits']} repeated values shared across {stats['interned_columns']} columns "
+              f"({stats['distinct_values']} distinct), ~{stats['saved_bytes'] / 1024:.0f} KiB saved; "
+              f"{stats['free_text_columns']} free-text columns left alone.")
+
+
+class JobRecord:
+    # One job as two parallel tuples: the slots it has a value for, in order, and those values.
+    # Missing fields take no space at all; sinks pad a row out to every known column only as
+    # they write it.
+    __slots__ = ('registry', 'slots', 'values')
+
+    def __init__(self, registry, slots, values):
+        self.registry = registry
+        self.slots = slots
+        self.values = values
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __bool__(self):
+        return bool(self.slots)
+
+    def get_slot(self, slot, default=None):
+        # The record has a handful of fields, so a scan beats building an index
+        for i, own_slot in enumerate(self.slots):
+            if own_slot == slot:
+                return self.values[i]
+        return default
+
+    def get(self, name, default=None):
+        slot = self.registry._slots.get(name)
+        return default if slot is None else self.get_slot(slot, default)
+
+    def __getitem__(self, name):
+        value = self.get(name, KeyError)
+        if value is KeyError:
+            raise KeyError(name)
+        return value
+
+    @property
+    def max_slot(self):
+        return self.slots[-1] if self.slots else -1
+
+    def items(self):
+        columns = self.registry.columns
+        return [(columns[slot], value) for slot, value in zip(self.slots, self.values)]
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def row(self, width):
+        # The padded row, materialised only for writing
+        row = [''] * width
+        for slot, value in zip(self.slots, self.values):
+            row[slot] = value
+        return row
+
+
+columns = ColumnRegistry()  # Shared by everything in the process that builds or writes records
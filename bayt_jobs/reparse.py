@@ -0,0 +1,121 @@
+import argparse
+import glob
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from . import records
+from .extractors import DEFAULT_EXTRACTOR, EXTRACTORS, extract_job_details
+from .crawler import ARCHIVE_DIR_NAME, DIR_PATH, add_output_arguments, file_name, folder_name, open_sinks
+from .page_archive import PageArchive, read_record
+
+# Pages handed to a worker process at a time; big enough that pickling results is not the bottleneck
+BATCH_SIZE = 200
+
+
+def iter_sources(source):
+    # (job ID, where its page is) for the newest archived detail page of each job,
+    # or for every saved .html file in a directory, named <job ID>.html
+    if os.path.exists(os.path.join(source, 'index.sqlite3')):
+        archive = PageArchive(source)
+        try:
+            for job_id, segment_path, offset, length in archive.iter_latest('detail'):
+                yield job_id, (segment_path, offset, length)
+        finally:
+            archive.close()
+    else:
+        for path in sorted(glob.glob(os.path.join(source, '**', '*.htm*'), recursive=True)):
+            yield os.path.splitext(os.path.basename(path))[0], path
+
+
+def iter_batches(items, size=BATCH_SIZE):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def parse_batch(batch, parser):
+    # Runs in a worker process: reads and decompresses the pages itself, so only
+    # locations go in and records come out
+    results = []
+    for job_id, location in batch:
+        try:
+            if isinstance(location, tuple):
+                content = read_record(*location)
+            else:
+                with open(location, 'rb') as f:
+                    content = f.read()
+            results.append(extract_job_details(content, job_id, parser))
+        except Exception as e:
+            print(f"Error occurred while parsing data for Job ID: {job_id}. {str(e)}")
+            results.append({})
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m bayt_jobs reparse', description='Rebuild the job dataset from stored detail pages, offline')
+    parser.add_argument('source', nargs='?', default=os.path.join(DIR_PATH, folder_name, ARCHIVE_DIR_NAME),
+                        help=f'page archive written by --archive, or a directory of <job ID>.html files '
+                             f'(default: {folder_name}/{ARCHIVE_DIR_NAME})')
+    parser.add_argument('--parser', choices=EXTRACTORS, default=DEFAULT_EXTRACTOR,
+                        help=f'HTML extraction backend (default: {DEFAULT_EXTRACTOR})')
+    parser.add_argument('--processes', type=int, default=None,
+                        help='worker processes (default: one per core)')
+    add_output_arguments(parser)
+    parser.add_argument('--output', default=None,
+                        help=f'CSV path; a Parquet file goes next to it (default: {folder_name}/{file_name})')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not os.path.isdir(args.source):
+        print(f"'{args.source}' is not a page archive or a directory of HTML files.")
+        return 1
+    records.columns.intern_max_values = args.intern_max_values
+
+    csv_path = args.output or os.path.join(DIR_PATH, folder_name, file_name)
+    os.makedirs(os.path.dirname(os.path.abspath(csv_path)), exist_ok=True)
+    sinks = open_sinks(csv_path, args.format, args.row_group_size)
+
+    pages = failed = 0
+    start_time = time.perf_counter()
+    processes = args.processes or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        # map() keeps the output in archive order while all workers stay busy
+        batches = executor.map(parse_batch, iter_batches(iter_sources(args.source)), itertools.repeat(args.parser))
+        for batch in batches:
+            for record in batch:
+                pages += 1
+                if not record:
+                    failed += 1
+                    continue
+                record = records.columns.record(record)
+                for output in sinks.values():
+                    output.write(record)
+
+    elapsed = time.perf_counter() - start_time
+    if pages == failed:
+        for output in sinks.values():
+            output.discard()
+        print("No job pages found." if not pages else "No job pages could be parsed.")
+        return 1
+
+    for output_path, output in sinks.items():
+        output.close()
+        print(f"Data has been successfully saved to '{output_path}'.")
+    print(f"Re-parsed {pages} pages in {elapsed:.1f}s ({pages / elapsed:.0f} pages/s) "
+          f"using {processes} processes; {failed} could not be parsed.")
+    records.columns.intern_report()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
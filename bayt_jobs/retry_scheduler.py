@@ -0,0 +1,76 @@
+import heapq
+import itertools
+import threading
+import time
+from random import uniform
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class RetryableFetchError(Exception):
+    # A throttled, timed-out or otherwise transient request that is worth another attempt
+    def __init__(self, reason, retry_after=None):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+class RetryScheduler:
+    # Decides when a failed request is tried again and keeps the list of requests that never made it.
+    # Delays are exponential with full jitter, so workers that failed together do not retry together.
+    # Engines wait out the delay without holding a worker: coroutines sleep outside their concurrency
+    # slot, and thread-based engines hand the retry to call_later(), whose single timer thread puts
+    # it back on the work queue when it is due.
+
+    def __init__(self, max_attempts=4, base_delay=1.0, max_delay=60.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failed = {}
+        self.stats = {'retries': 0, 'failed': 0}
+        self._lock = threading.Lock()
+        self._timers = []
+        self._timer_ids = itertools.count()
+        self._timer_wakeup = threading.Condition(self._lock)
+        self._timer_thread = None
+
+    def backoff(self, attempt, retry_after=None):
+        delay = uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        return max(delay, retry_after or 0)
+
+    def next_delay(self, key, attempt, error):
+        # attempt counts from 0; returns None once the key has used up its attempts
+        if attempt + 1 >= self.max_attempts:
+            self.record_failure(key, f"{error} (gave up after {attempt + 1} attempts)")
+            return None
+        with self._lock:
+            self.stats['retries'] += 1
+        return self.backoff(attempt, error.retry_after)
+
+    def record_failure(self, key, reason):
+        with self._lock:
+            self.failed[key] = str(reason)
+            self.stats['failed'] += 1
+
+    def call_later(self, delay, callback):
+        with self._lock:
+            heapq.heappush(self._timers, (time.monotonic() + delay, next(self._timer_ids), callback))
+            if self._timer_thread is None:
+                self._timer_thread = threading.Thread(target=self._run_timers, name='retry-timer', daemon=True)
+                self._timer_thread.start()
+            self._timer_wakeup.notify()
+
+    def _run_timers(self):
+        while True:
+            with self._lock:
+                while not self._timers or self._timers[0][0] > time.monotonic():
+                    timeout = self._timers[0][0] - time.monotonic() if self._timers else None
+                    self._timer_wakeup.wait(timeout)
+                _, _, callback = heapq.heappop(self._timers)
+            callback()
+
+    def report(self):
+        if not self.failed:
+            return
+        print(f"{len(self.failed)} requests failed permanently:")
+        for key, reason in sorted(self.failed.items()):
+            print(f"  {key}: {reason}")
@@ -0,0 +1,46 @@
+import itertools
+import queue
+from collections import deque
+
+
+class FairQueue(queue.Queue):
+    # A queue of (frontier, item) pairs served round robin by frontier: first in, first out within
+    # one country's listing, but one item from each country in turn, so a country with a long listing
+    # cannot hold the shared request budget while the others wait.
+    # Blocking, maxsize and qsize() come from queue.Queue, which only calls these four methods.
+
+    def _init(self, maxsize):
+        self._frontiers = {}
+        self._turns = deque()  # Frontiers with queued items, in serving order
+        self._size = 0
+
+    def _qsize(self):
+        return self._size
+
+    def _put(self, entry):
+        frontier = entry[0]
+        pending = self._frontiers.get(frontier)
+        if pending is None:
+            pending = self._frontiers[frontier] = deque()
+            self._turns.append(frontier)
+        pending.append(entry)
+        self._size += 1
+
+    def _get(self):
+        frontier = self._turns.popleft()
+        pending = self._frontiers[frontier]
+        entry = pending.popleft()
+        if pending:
+            self._turns.append(frontier)
+        else:
+            del self._frontiers[frontier]
+        self._size -= 1
+        return entry
+
+
+def round_robin(job_ids, frontier_of):
+    # The batch engines' version of FairQueue: one job from each frontier in turn
+    frontiers = {}
+    for job_id in sorted(job_ids):
+        frontiers.setdefault(frontier_of(job_id), []).append(job_id)
+    return [job_id for turn in itertools.zip_longest(*frontiers.values()) for job_id in turn if job_id is not None]
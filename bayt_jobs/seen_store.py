@@ -0,0 +1,111 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    details_fetched_at TEXT,
+    closed_at TEXT,
+    fingerprint TEXT,
+    field_digests TEXT,
+    country TEXT
+)
+'''
+# Columns added after the first release, for stores created before them
+ADDED_COLUMNS = {'fingerprint': 'TEXT', 'field_digests': 'TEXT', 'country': 'TEXT'}
+# Rows stored before the country column have none; the scraper only listed Saudi Arabia then
+LEGACY_COUNTRY = 'saudi-arabia'
+
+
+def utc_now():
+    return datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+
+class SeenJobStore:
+    # Job IDs from earlier runs, so an incremental run only fetches details for postings it has not
+    # scraped yet and can tell which postings have disappeared from the listing since.
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute(SCHEMA)
+        existing = {row[1] for row in self._connection.execute('PRAGMA table_info(jobs)')}
+        for name, column_type in ADDED_COLUMNS.items():
+            if name not in existing:
+                self._connection.execute(f'ALTER TABLE jobs ADD COLUMN {name} {column_type}')
+        self._connection.commit()
+
+    def mark_seen(self, job_ids, seen_at, country):
+        # country is the listing the jobs were found on, so close_missing only closes them when that
+        # listing is walked again. A closed job listed again is reopened without its old fingerprint, so
+        # --delta reports it as new (the SET expressions all read the row as it was before the update)
+        with self._lock:
+            self._connection.executemany(
+                'INSERT INTO jobs (job_id, first_seen, last_seen, country) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT(job_id) DO UPDATE SET last_seen = excluded.last_seen, closed_at = NULL, '
+                'country = excluded.country, '
+                'fingerprint = CASE WHEN closed_at IS NULL THEN fingerprint END, '
+                'field_digests = CASE WHEN closed_at IS NULL THEN field_digests END',
+                [(job_id, seen_at, seen_at, country) for job_id in job_ids])
+            self._connection.commit()
+
+    def filter_unfetched(self, job_ids):
+        job_ids = list(job_ids)
+        fetched = set()
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for i in range(0, len(job_ids), 500):
+                chunk = job_ids[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._connection.execute(
+                    f'SELECT job_id FROM jobs WHERE details_fetched_at IS NOT NULL AND job_id IN ({placeholders})',
+                    chunk)
+                fetched.update(row[0] for row in rows)
+        return [job_id for job_id in job_ids if job_id not in fetched]
+
+    def mark_fetched(self, job_id, fetched_at=None, fingerprint=None):
+        # fingerprint is (record digest, {field: digest}) from delta.fingerprint()
+        with self._lock:
+            if fingerprint is None:
+                self._connection.execute('UPDATE jobs SET details_fetched_at = ? WHERE job_id = ?',
+                                         (fetched_at or utc_now(), job_id))
+            else:
+                self._connection.execute(
+                    'UPDATE jobs SET details_fetched_at = ?, fingerprint = ?, field_digests = ? WHERE job_id = ?',
+                    (fetched_at or utc_now(), fingerprint[0], json.dumps(fingerprint[1], ensure_ascii=False), job_id))
+            self._connection.commit()
+
+    def fingerprint(self, job_id):
+        # The fingerprint stored by the last run that fetched this job, or None
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT fingerprint, field_digests FROM jobs WHERE job_id = ? AND fingerprint IS NOT NULL',
+                (job_id,)).fetchone()
+        return None if row is None else (row[0], json.loads(row[1]))
+
+    def close_missing(self, run_started_at, countries):
+        # Anything still open in one of these countries that this run's listing walk did not touch has
+        # been taken down; returns the job IDs closed. Jobs from countries the run did not walk are left
+        # alone. Their fingerprints go too: a job that was reported removed is new again if it comes back.
+        countries = list(countries)
+        where = (f"closed_at IS NULL AND last_seen < ? "
+                 f"AND COALESCE(country, ?) IN ({','.join('?' * len(countries))})")
+        params = (run_started_at, LEGACY_COUNTRY, *countries)
+        with self._lock:
+            job_ids = [row[0] for row in self._connection.execute(f'SELECT job_id FROM jobs WHERE {where}', params)]
+            self._connection.execute(
+                f'UPDATE jobs SET closed_at = ?, fingerprint = NULL, field_digests = NULL WHERE {where}',
+                (utc_now(), *params))
+            self._connection.commit()
+            return job_ids
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
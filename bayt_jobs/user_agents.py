@@ -0,0 +1,31 @@
+import os
+import random
+
+# Ships with the package, so rotation works without network access
+USER_AGENTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'user_agents.txt')
+
+_path = USER_AGENTS_FILE
+_pool = None
+
+
+def load_user_agents(path):
+    with open(path, encoding='utf-8') as f:
+        user_agents = tuple(line.strip() for line in f if line.strip() and not line.startswith('#'))
+    if not user_agents:
+        raise ValueError(f"No User-Agents found in '{path}'.")
+    return user_agents
+
+
+def use_user_agents(path):
+    # Rotate through the User-Agents in another file instead of the bundled list
+    global _path, _pool
+    _path = path
+    _pool = None
+
+
+def random_user_agent():
+    # The pool is read on the first request rather than at import; picking from a tuple is O(1)
+    global _pool
+    if _pool is None:
+        _pool = load_user_agents(_path)
+    return _pool[random.randrange(len(_pool))]
@@ -0,0 +1,165 @@
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from .seen_store import utc_now
+
+DEFAULT_LEASE_SECONDS = 120
+DEFAULT_BATCH_SIZE = 50
+# A job whose lease has run out this many times is not handed out again: it keeps taking its worker down
+MAX_LEASES = 3
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS work (
+    job_id TEXT PRIMARY KEY,
+    country TEXT,
+    state TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_expires REAL,
+    leases INTEGER NOT NULL DEFAULT 0,
+    finished_at TEXT
+);
+CREATE INDEX IF NOT EXISTS work_by_state ON work (state, lease_expires);
+CREATE TABLE IF NOT EXISTS frontiers (
+    country TEXT PRIMARY KEY,
+    listing_done_at TEXT
+);
+CREATE TABLE IF NOT EXISTS workers (
+    worker TEXT PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    heartbeat TEXT NOT NULL,
+    jobs_done INTEGER NOT NULL DEFAULT 0
+);
+'''
+
+# Claimable: never handed out, or leased to a worker that stopped renewing the lease
+CLAIMABLE = "(state = 'pending' OR (state = 'leased' AND lease_expires < ?)) AND leases < ?"
+
+
+class WorkQueue:
+    # Job IDs shared by worker processes through one SQLite file, on one machine or on a filesystem
+    # several machines mount. 'enqueue' fills it from the listings; each worker leases a batch,
+    # renews its leases with heartbeat() while it works, and marks the batch done once its records
+    # are safely on disk. A batch whose lease runs out (the worker died, hung or lost the mount)
+    # is handed to the next worker that asks.
+    # Lease times are wall-clock, so machines sharing a queue need synchronised clocks. The database
+    # stays in rollback-journal mode: WAL needs shared memory, which network filesystems do not have.
+
+    def __init__(self, db_path, timeout=60):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        # Autocommit, with explicit BEGIN IMMEDIATE where a read decides a write
+        self._connection = sqlite3.connect(db_path, timeout=timeout, check_same_thread=False, isolation_level=None)
+        self._connection.executescript(SCHEMA)
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._connection.execute('BEGIN IMMEDIATE')
+            try:
+                yield self._connection
+            except BaseException:
+                self._connection.execute('ROLLBACK')
+                raise
+            self._connection.execute('COMMIT')
+
+    def start_listing(self, countries):
+        with self._transaction() as connection:
+            connection.executemany('INSERT OR IGNORE INTO frontiers (country) VALUES (?)',
+                                   [(country,) for country in countries])
+
+    def add(self, country, job_ids):
+        # Jobs already queued, by this listing or another country's, are left as they are
+        with self._transaction() as connection:
+            before = connection.total_changes
+            connection.executemany('INSERT OR IGNORE INTO work (job_id, country) VALUES (?, ?)',
+                                   [(job_id, country) for job_id in job_ids])
+            return connection.total_changes - before
+
+    def listing_done(self, country):
+        with self._transaction() as connection:
+            connection.execute('UPDATE frontiers SET listing_done_at = ? WHERE country = ?', (utc_now(), country))
+
+    def register_worker(self, worker):
+        with self._transaction() as connection:
+            connection.execute(
+                'INSERT INTO workers (worker, started_at, heartbeat) VALUES (?, ?, ?) '
+                'ON CONFLICT(worker) DO UPDATE SET heartbeat = excluded.heartbeat',
+                (worker, utc_now(), utc_now()))
+
+    def claim(self, worker, count=DEFAULT_BATCH_SIZE, lease_seconds=DEFAULT_LEASE_SECONDS):
+        # [(job ID, country)] now leased to worker; empty when there is nothing to hand out right now
+        now = time.time()
+        with self._transaction() as connection:
+            rows = connection.execute(
+                f'SELECT job_id, country FROM work WHERE {CLAIMABLE} ORDER BY rowid LIMIT ?',
+                (now, MAX_LEASES, count)).fetchall()
+            connection.executemany(
+                "UPDATE work SET state = 'leased', worker = ?, lease_expires = ?, leases = leases + 1 "
+                "WHERE job_id = ?",
+                [(worker, now + lease_seconds, job_id) for job_id, _ in rows])
+        return rows
+
+    def heartbeat(self, worker, lease_seconds=DEFAULT_LEASE_SECONDS):
+        with self._transaction() as connection:
+            connection.execute("UPDATE work SET lease_expires = ? WHERE worker = ? AND state = 'leased'",
+                               (time.time() + lease_seconds, worker))
+            connection.execute('UPDATE workers SET heartbeat = ? WHERE worker = ?', (utc_now(), worker))
+
+    def complete(self, worker, done_job_ids, failed_job_ids=()):
+        finished_at = utc_now()
+        with self._transaction() as connection:
+            connection.executemany("UPDATE work SET state = 'done', worker = ?, finished_at = ? WHERE job_id = ?",
+                                   [(worker, finished_at, job_id) for job_id in done_job_ids])
+            # Failed after the retry scheduler's attempts; another lease would fail the same way
+            connection.executemany(
+                "UPDATE work SET state = 'failed', worker = ?, finished_at = ? WHERE job_id = ? AND state != 'done'",
+                [(worker, finished_at, job_id) for job_id in failed_job_ids])
+            connection.execute('UPDATE workers SET jobs_done = jobs_done + ? WHERE worker = ?',
+                               (len(done_job_ids), worker))
+
+    def release(self, worker):
+        # A worker shutting down hands its unfinished leases straight back instead of letting them expire
+        with self._transaction() as connection:
+            connection.execute("UPDATE work SET state = 'pending', worker = NULL, lease_expires = NULL, "
+                               "leases = leases - 1 WHERE worker = ? AND state = 'leased'", (worker,))
+
+    def listing_finished(self):
+        with self._lock:
+            total, done = self._connection.execute(
+                'SELECT COUNT(*), COUNT(listing_done_at) FROM frontiers').fetchone()
+        return total > 0 and total == done
+
+    def is_finished(self):
+        # Every listing walked and nothing left that a worker holds or could still claim
+        if not self.listing_finished():
+            return False
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT 1 FROM work WHERE ({CLAIMABLE}) OR (state = 'leased' AND lease_expires >= ?) LIMIT 1",
+                (time.time(), MAX_LEASES, time.time())).fetchone()
+        return row is None
+
+    def stats(self):
+        with self._lock:
+            states = dict(self._connection.execute('SELECT state, COUNT(*) FROM work GROUP BY state'))
+            reissued = self._connection.execute(
+                'SELECT COALESCE(SUM(leases - 1), 0) FROM work WHERE leases > 1').fetchone()[0]
+            abandoned = self._connection.execute(
+                "SELECT COUNT(*) FROM work WHERE state = 'leased' AND leases >= ? AND lease_expires < ?",
+                (MAX_LEASES, time.time())).fetchone()[0]
+            workers = self._connection.execute('SELECT COUNT(*) FROM workers').fetchone()[0]
+        return {
+            'pending': states.get('pending', 0),
+            'leased': states.get('leased', 0) - abandoned,
+            'done': states.get('done', 0),
+            'failed': states.get('failed', 0),
+            'abandoned': abandoned,
+            'reissued': reissued,
+            'workers': workers,
+        }
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,231 @@
+import argparse
+import asyncio
+import glob
+import json
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from . import crawler, records
+from .crawler import DEFAULT_COUNTRIES, DIR_PATH, ENGINES, file_name, folder_name, open_sinks
+from .work_queue import DEFAULT_BATCH_SIZE, DEFAULT_LEASE_SECONDS, WorkQueue
+
+# Sharded crawling: 'enqueue' walks the listings into a shared work queue, any number of 'worker'
+# processes (on this machine or others mounting the same output directory) fetch the details, and
+# 'merge' combines their outputs into the usual dataset.
+QUEUE_NAME = 'work_queue.sqlite3'
+WORKERS_DIR_NAME = 'workers'
+
+
+def output_dir(args):
+    return args.output_dir or os.path.join(DIR_PATH, folder_name)
+
+
+def queue_path(args):
+    return args.queue or os.path.join(output_dir(args), QUEUE_NAME)
+
+
+def add_queue_argument(parser):
+    parser.add_argument('--queue', default=None, metavar='PATH',
+                        help=f'shared work queue database (default: {QUEUE_NAME} in the output directory)')
+
+
+def print_queue_stats(work):
+    stats = work.stats()
+    print(f"Work queue: {stats['done']} done, {stats['pending']} pending, {stats['leased']} leased, "
+          f"{stats['failed']} failed, {stats['abandoned']} abandoned after repeated lost leases; "
+          f"{stats['reissued']} expired leases re-issued across {stats['workers']} workers.")
+
+
+def parse_enqueue_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m bayt_jobs enqueue',
+                                     description='Walk the listings into a work queue for "python -m bayt_jobs worker"')
+    crawler.add_listing_arguments(parser)
+    crawler.add_fetch_arguments(parser)
+    add_queue_argument(parser)
+    parser.set_defaults(engine=None, concurrency=None)  # No detail fetches here
+    return parser.parse_args(argv)
+
+
+def enqueue_main(argv=None):
+    args = parse_enqueue_args(argv)
+    path = output_dir(args)
+    urls = crawler.configure(args, path)
+    work = WorkQueue(queue_path(args))
+    work.start_listing(urls)
+    added = 0
+
+    def on_listing_done(country, complete):
+        # A listing that stopped short still counts as done, or the workers would wait for it forever
+        work.listing_done(country)
+        if not complete:
+            print(f"The {country} listing was not walked to its end; run enqueue again to queue the rest.")
+
+    try:
+        # Workers can start on the first pages while later ones are still being listed
+        for country, page, job_ids in crawler.iter_frontier_pages(urls, args.listing_concurrency, None,
+                                                                  on_listing_done):
+            added += work.add(country, job_ids)
+    finally:
+        crawler.close_stores()
+    print(f"Queued {added} new job IDs from {len(urls)} countries in '{work.db_path}'.")
+    print_queue_stats(work)
+    work.close()
+    return 0
+
+
+def parse_worker_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m bayt_jobs worker',
+                                     description='Fetch job details leased from a shared work queue')
+    # A worker fetches leased batches, so the pipelined engine (which feeds itself from the listing) is out
+    crawler.add_detail_arguments(parser, [engine for engine in ENGINES if engine != 'pipelined'])
+    crawler.add_fetch_arguments(parser)
+    add_queue_argument(parser)
+    parser.add_argument('--worker-id', default=None,
+                        help='name of this worker and of its output directory (default: <host>-<pid>)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f'job IDs leased at a time (default: {DEFAULT_BATCH_SIZE})')
+    parser.add_argument('--lease', type=float, default=DEFAULT_LEASE_SECONDS,
+                        help='seconds a lease lasts without a heartbeat before its jobs go to another worker '
+                             f'(default: {DEFAULT_LEASE_SECONDS})')
+    parser.add_argument('--poll', type=float, default=2.0,
+                        help='seconds to wait for more work while the listing is still being queued (default: 2)')
+    parser.set_defaults(countries=DEFAULT_COUNTRIES, max_pages=None, listing_concurrency=1)  # No listing walk here
+    return parser.parse_args(argv)
+
+
+def write_batch(worker_dir, number, results):
+    # Written aside and renamed, so a batch file is either complete or absent
+    path = os.path.join(worker_dir, f'batch-{number:05d}.jsonl')
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        for result in results:
+            f.write(json.dumps(result, ensure_ascii=False) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + '.tmp', path)
+
+
+def iter_batch_records(path):
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def heartbeat(work, worker_id, lease_seconds, stop):
+    while not stop.wait(lease_seconds / 3):
+        try:
+            work.heartbeat(worker_id, lease_seconds)
+        except Exception as e:
+            print(f"Heartbeat failed: {str(e)}")
+
+
+async def run_worker(argv=None):
+    args = parse_worker_args(argv)
+    path = output_dir(args)
+    worker_id = args.worker_id or f'{socket.gethostname()}-{os.getpid()}'
+    worker_dir = os.path.join(path, WORKERS_DIR_NAME, worker_id)
+    crawler.configure(args, worker_dir)
+    work = WorkQueue(queue_path(args))
+    work.register_worker(worker_id)
+    stop = threading.Event()
+    threading.Thread(target=heartbeat, args=(work, worker_id, args.lease, stop), name='heartbeat',
+                     daemon=True).start()
+
+    # A restarted worker with the same ID carries on numbering after its earlier batches
+    batches = len(glob.glob(os.path.join(worker_dir, 'batch-*.jsonl')))
+    jobs = failed = 0
+    parse_pool = ProcessPoolExecutor(max_workers=args.parse_processes) if args.parse_processes > 0 else None
+    start_time = time.perf_counter()
+    print(f"Worker {worker_id} taking jobs from '{work.db_path}'"
+          + (f" through {args.proxy}." if args.proxy else "."))
+    try:
+        while True:
+            batch = work.claim(worker_id, args.batch_size, args.lease)
+            if not batch:
+                if work.is_finished():
+                    break
+                await asyncio.sleep(args.poll)
+                continue
+
+            results = []
+            await crawler.fetch_details([job_id for job_id, _ in batch], results.append, args.engine,
+                                        args.concurrency, parse_pool)
+            results = [result for result in results if result]
+            batches += 1
+            write_batch(worker_dir, batches, results)
+            done_job_ids = {result['Job ID'] for result in results}
+            failed_job_ids = [job_id for job_id, _ in batch if job_id not in done_job_ids]
+            work.complete(worker_id, done_job_ids, failed_job_ids)
+            jobs += len(done_job_ids)
+            failed += len(failed_job_ids)
+            print(f"Worker {worker_id}: batch {batches} done, {jobs} jobs so far.")
+    finally:
+        stop.set()
+        work.release(worker_id)
+        if parse_pool is not None:
+            parse_pool.shutdown()
+        crawler.close_stores()
+
+    elapsed = time.perf_counter() - start_time
+    print(f"Worker {worker_id} fetched {jobs} job details ({failed} failed) in {elapsed:.1f}s "
+          f"using the {args.engine} engine.")
+    crawler.retry_scheduler.report()
+    crawler.metrics.set('jobs_written', jobs)
+    crawler.metrics.set('run_seconds', elapsed)
+    crawler.metrics.write_json(os.path.join(worker_dir, crawler.STATS_NAME))
+    if args.prometheus:
+        crawler.metrics.write_prometheus(args.prometheus)
+    work.close()
+    return 0
+
+
+def worker_main(argv=None):
+    return asyncio.run(run_worker(argv))
+
+
+def merge_main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m bayt_jobs merge', description="Combine the workers' outputs into one dataset")
+    parser.add_argument('--output-dir', default=None,
+                        help=f'the output directory the workers wrote to (default: {folder_name})')
+    add_queue_argument(parser)
+    crawler.add_output_arguments(parser)
+    args = parser.parse_args(argv)
+    path = output_dir(args)
+    records.columns.intern_max_values = args.intern_max_values
+
+    if os.path.exists(queue_path(args)):
+        work = WorkQueue(queue_path(args))
+        if not work.is_finished():
+            print("The work queue is not finished yet; merging the batches written so far.")
+        print_queue_stats(work)
+        work.close()
+
+    batch_paths = sorted(glob.glob(os.path.join(path, WORKERS_DIR_NAME, '*', 'batch-*.jsonl')))
+    if not batch_paths:
+        print(f"No worker output found in '{os.path.join(path, WORKERS_DIR_NAME)}'.")
+        return 1
+
+    sinks = open_sinks(os.path.join(path, file_name), args.format, args.row_group_size)
+    seen_job_ids = set()
+    duplicates = 0
+    for batch_path in batch_paths:
+        for record in iter_batch_records(batch_path):
+            # A job whose lease expired while its worker was still on it can be fetched twice
+            if record['Job ID'] in seen_job_ids:
+                duplicates += 1
+                continue
+            seen_job_ids.add(record['Job ID'])
+            record = records.columns.record(record)
+            for output in sinks.values():
+                output.write(record)
+
+    for sink_path, output in sinks.items():
+        output.close()
+        print(f"Data has been successfully saved to '{sink_path}'.")
+    workers = len({os.path.dirname(batch_path) for batch_path in batch_paths})
+    print(f"Merged {len(seen_job_ids)} jobs from {len(batch_paths)} batches of {workers} workers "
+          f"({duplicates} duplicates dropped).")
+    return 0
@@ -0,0 +1,41 @@
+import csv
+import os
+
+from bayt_jobs.csv_sink import StreamingCsvSink
+from bayt_jobs.records import ColumnRegistry
+
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        return list(csv.reader(f))
+
+
+def test_columns_found_mid_run(tmp_path):
+    # Rows written before a column was first seen are padded for it; the header puts 'Job ID' and
+    # 'Job Name' first and sorts the rest, whatever order the columns turned up in
+    path = str(tmp_path / 'jobs.csv')
+    sink = StreamingCsvSink(path, registry=ColumnRegistry())
+    sink.write({'Job ID': '1', 'Job Name': 'Engineer', 'Job Location': 'Riyadh'})
+    sink.write({'Job ID': '2', 'Job Name': 'Nurse', 'Employment Type': 'Full Time'})
+    sink.write({'Job ID': '3', 'Job Location': 'Jeddah', 'Company Industry': 'Healthcare', 'Job Name': 'Doctor'})
+    sink.close()
+
+    assert read_csv(path) == [
+        ['Job ID', 'Job Name', 'Company Industry', 'Employment Type', 'Job Location'],
+        ['1', 'Engineer', '', '', 'Riyadh'],
+        ['2', 'Nurse', '', 'Full Time', ''],
+        ['3', 'Doctor', 'Healthcare', '', 'Jeddah'],
+    ]
+    assert not os.path.exists(path + '.part') and not os.path.exists(path + '.schema.json')
+
+
+def test_failed_fetches_are_not_rows(tmp_path):
+    path = str(tmp_path / 'jobs.csv')
+    sink = StreamingCsvSink(path, registry=ColumnRegistry())
+    sink.write({})
+    sink.write({'Job ID': '1', 'Job Name': 'Engineer'})
+    sink.write({})
+    sink.close()
+
+    assert sink.rows == 1
+    assert read_csv(path) == [['Job ID', 'Job Name'], ['1', 'Engineer']]
@@ -0,0 +1,44 @@
+import os
+
+import pytest
+
+from bayt_jobs.extractors import DEFAULT_EXTRACTOR, EXTRACTORS, get_extractor
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), 'rb') as f:
+        return f.read()
+
+
+@pytest.fixture(params=sorted(EXTRACTORS))
+def extractor(request):
+    if request.param == 'lxml':
+        pytest.importorskip('lxml')
+    return get_extractor(request.param)
+
+
+def test_job_ids(extractor):
+    # Class lists with stray whitespace still count; cards without an ID, or without the class, do not
+    assert extractor.job_ids(fixture('listing_page.html')) == {'4971021', '4971022', '4971023'}
+
+
+def test_job_details(extractor):
+    assert extractor.job_details(fixture('detail_page.html'), '4971021') == {
+        'Job ID': '4971021',
+        'Job Name': 'Senior Site Engineer & Planner',
+        'Job Location': 'Riyadh, Saudi Arabia',
+        'Company Industry': 'Construction;\n    Civil Engineering',
+        'Employment Type': 'Full Time',
+        'Monthly Salary Range': 'Unspecified',
+        'Job Role': 'مهندس موقع',
+    }
+
+
+def test_backends_match_reference(extractor):
+    reference = get_extractor(DEFAULT_EXTRACTOR)
+    for name in ('listing_page.html', 'detail_page.html'):
+        content = fixture(name)
+        assert extractor.job_ids(content) == reference.job_ids(content)
+        assert extractor.job_details(content, name) == reference.job_details(content, name)
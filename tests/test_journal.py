@@ -0,0 +1,46 @@
+from bayt_jobs.journal import CrawlJournal, intact_length, iter_journal_records, load_journal_state
+
+
+def write_journal(path):
+    journal = CrawlJournal(path)
+    journal.start('2026-01-01T00:00:00+00:00')
+    # Concurrently fetched pages finish out of order, and page 3 never did
+    journal.page(2, {'21', '22'}, 'saudi-arabia')
+    journal.page(1, {'11', '12'}, 'saudi-arabia')
+    journal.page(4, {'41'}, 'saudi-arabia')
+    journal.page(1, {'91'}, 'uae')
+    journal.listing_done('uae', True)
+    journal.record({'Job ID': '11', 'Job Name': 'Engineer'})
+    journal.close()
+
+
+def test_state_of_an_interrupted_run(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    write_journal(path)
+    state = load_journal_state(path)
+
+    assert state.started_at == '2026-01-01T00:00:00+00:00'
+    assert state.next_page('saudi-arabia') == 3
+    assert state.next_page('uae') == 2
+    assert state.next_page('qatar') == 1
+    assert state.listing_complete == {'uae'}
+    assert state.missing_job_ids == {'12': 'saudi-arabia', '21': 'saudi-arabia', '22': 'saudi-arabia',
+                                     '41': 'saudi-arabia', '91': 'uae'}
+
+
+def test_resume_truncates_a_torn_line(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    write_journal(path)
+    with open(path, 'rb') as f:
+        intact = len(f.read())
+    # A crash mid-write leaves a line without its newline, even one that parses on its own
+    with open(path, 'ab') as f:
+        f.write(b'{"type": "record", "record": {"Job ID": "12"}}')
+    assert intact_length(path) == intact
+
+    journal = CrawlJournal(path, append=True)
+    journal.record({'Job ID': '21', 'Job Name': 'Nurse'})
+    journal.close()
+
+    assert [record['Job ID'] for record in iter_journal_records(path)] == ['11', '21']
+    assert load_journal_state(path).next_page('saudi-arabia') == 3
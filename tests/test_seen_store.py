@@ -0,0 +1,35 @@
+import sqlite3
+
+from bayt_jobs.seen_store import SeenJobStore
+
+
+def open_rows(store):
+    return {row[0] for row in store._connection.execute('SELECT job_id FROM jobs WHERE closed_at IS NULL')}
+
+
+def test_close_missing_only_in_walked_countries(tmp_path):
+    store = SeenJobStore(str(tmp_path / 'seen.sqlite3'))
+    store.mark_seen(['1', '2'], '2026-01-01T00:00:00+00:00', 'saudi-arabia')
+    store.mark_seen(['3', '4'], '2026-01-01T00:00:00+00:00', 'uae')
+
+    # A later run walks Saudi Arabia only, where job 2 is gone and job 4 is now cross-posted
+    store.mark_seen(['1', '4'], '2026-01-02T00:00:00+00:00', 'saudi-arabia')
+    assert store.close_missing('2026-01-02T00:00:00+00:00', ['saudi-arabia']) == ['2']
+    assert open_rows(store) == {'1', '3', '4'}
+    store.close()
+
+
+def test_rows_from_before_the_country_column(tmp_path):
+    path = str(tmp_path / 'seen.sqlite3')
+    connection = sqlite3.connect(path)
+    connection.execute('CREATE TABLE jobs (job_id TEXT PRIMARY KEY, first_seen TEXT NOT NULL, '
+                       'last_seen TEXT NOT NULL, details_fetched_at TEXT, closed_at TEXT)')
+    connection.execute("INSERT INTO jobs VALUES ('1', '2026-01-01', '2026-01-01', NULL, NULL)")
+    connection.commit()
+    connection.close()
+
+    # Those stores only ever held Saudi Arabia's listing
+    store = SeenJobStore(path)
+    assert store.close_missing('2026-01-02', ['uae']) == []
+    assert store.close_missing('2026-01-02', ['saudi-arabia']) == ['1']
+    store.close()